@@ -0,0 +1,263 @@
+import os
+import io
+import time
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.models import PARAM_KEYS, SublimationModel, MassModel, SizeModel
+from app.batch import TXT_EXTENSIONS, FITS_EXTENSIONS
+from app.fits_headers import read_fits_keys
+from app.readers import decompressed, plain_name, parse_dates
+
+INDEX_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'kubsu_astro_app', 'archive.sqlite')
+# Параметры моделей -> колонки индекса: SQLite не различает регистр имён (H и h),
+# а «Afρ0» неудобно писать в запросах
+PARAM_COLUMNS = {
+    'T': 't',
+    'r0': 'r0',
+    'r_earth': 'r_earth',
+    'Afρ0': 'afrho0',
+    'k': 'k',
+    'H': 'h',
+    'n': 'n',
+    'delta': 'delta',
+    'm_k': 'm_k',
+    'r': 'r',
+    'pv': 'pv',
+    'angular_size': 'angular_size',
+}
+TEXT_KEYS = ('DATE-OBS', 'OBJECT')
+COLUMNS = ['path', 'mtime_ns', 'size', 'object', 'date_obs', 'error'] + list(PARAM_COLUMNS.values())
+
+
+def _read_txt(path):
+    # KEY=VALUE как в load_txt_data, но без исключений на строковых значениях (DATE-OBS, OBJECT)
+    cards = {}
+    with open(path, 'rb') as raw, io.TextIOWrapper(decompressed(raw)) as f:
+        for line in f:
+            key, sep, value = line.partition('=')
+            if not sep:
+                continue
+            key, value = key.strip(), value.strip()
+            if key in TEXT_KEYS:
+                cards[key] = value.strip("'\"")
+                continue
+            try:
+                cards[key] = float(value)
+            except ValueError:
+                continue
+    return cards
+
+
+def index_file(entry):
+    # (путь, mtime_ns, размер) -> строка индекса; ошибка разбора попадает в колонку error
+    path, mtime_ns, size = entry
+    row = dict.fromkeys(COLUMNS)
+    row.update(path=path, mtime_ns=mtime_ns, size=size)
+    try:
+        if plain_name(path).lower().endswith(FITS_EXTENSIONS):
+            # Все заголовки (без данных): DATE-OBS часто в первичном HDU, параметры — в расширении
+            cards = read_fits_keys(path, PARAM_KEYS, stop_at_first=False, text_keys=TEXT_KEYS)
+        else:
+            cards = _read_txt(path)
+        for key, name in PARAM_KEYS.items():
+            value = cards.get(key, cards.get(name))
+            if value is not None:
+                row[PARAM_COLUMNS[name]] = float(value)
+        row['object'] = cards.get('OBJECT') or None
+        if cards.get('DATE-OBS'):
+            date = parse_dates([cards['DATE-OBS']], 's')[0]
+            row['date_obs'] = None if np.isnat(date) else str(date)
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def _scan(directory, recursive=True):
+    # {путь: (mtime_ns, размер)} файлов параметров и кадров FITS, в т.ч. сжатых
+    found = {}
+    pending = [os.path.abspath(directory)]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(entry.path)
+                elif plain_name(entry.name).lower().endswith(TXT_EXTENSIONS + FITS_EXTENSIONS):
+                    st = entry.stat()
+                    found[entry.path] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+class ArchiveIndex:
+    """ Индекс архива файлов параметров и кадров FITS в SQLite.
+
+    update() сканирует каталог и переразбирает в пуле процессов только новые и изменённые
+    (по mtime и размеру) файлы, удалённые убираются из индекса. query() выбирает файлы по
+    объекту, интервалу DATE-OBS и диапазонам параметров и возвращает колонки NumPy,
+    которые run_models() считает всеми моделями сразу.
+    """
+
+    def __init__(self, path=None):
+        path = path or INDEX_PATH
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self._create()
+
+    def _create(self):
+        params = ', '.join(f"{name} REAL" for name in PARAM_COLUMNS.values())
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+                f"object TEXT COLLATE NOCASE, date_obs TEXT, error TEXT, {params})"
+            )
+            for name in ('object', 'date_obs') + tuple(PARAM_COLUMNS.values()):
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS files_{name} ON files ({name})")
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, directory, workers=None, recursive=True, progress=None):
+        """ Привести индекс каталога в соответствие с диском.
+
+        progress(done, total) вызывается после каждого разобранного файла.
+        Возвращает сводку: сколько файлов найдено, переразобрано, удалено и с ошибками.
+        """
+        started = time.perf_counter()
+        on_disk = _scan(directory, recursive)
+        top = os.path.abspath(directory)
+        root = os.path.join(top, '')
+        known = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in self.connection.execute("SELECT path, mtime_ns, size FROM files")
+            # Без рекурсии подкаталоги не сканируются, и их файлы в индексе не трогаются
+            if path.startswith(root) and (recursive or os.path.dirname(path) == top)
+        }
+        changed = [(path, *stat) for path, stat in on_disk.items() if known.get(path) != stat]
+        removed = [(path,) for path in known.keys() - on_disk.keys()]
+
+        if workers == 1 or len(changed) < 2:
+            results = map(index_file, changed)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            chunksize = max(1, len(changed) // ((workers or os.cpu_count() or 1) * 4))
+            results = pool.map(index_file, changed, chunksize=chunksize)
+
+        rows = []
+        try:
+            for done, row in enumerate(results, 1):
+                rows.append(tuple(row[c] for c in COLUMNS))
+                if progress:
+                    progress(done, len(changed))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # Одна транзакция на всё обновление: executemany без фиксации на каждой строке
+        placeholders = ', '.join('?' * len(COLUMNS))
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", removed)
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO files ({', '.join(COLUMNS)}) VALUES ({placeholders})", rows
+            )
+        return {
+            "files": len(on_disk),
+            "indexed": len(rows),
+            "removed": len(removed),
+            "errors": sum(row[COLUMNS.index('error')] is not None for row in rows),
+            "seconds": time.perf_counter() - started,
+        }
+
+    def query(self, object_name=None, date_from=None, date_to=None, include_errors=False, **ranges):
+        """ Файлы индекса по условиям, в виде колонок.
+
+        object_name — OBJECT без учёта регистра; date_from/date_to — границы DATE-OBS (строки ISO или
+        datetime64); ranges — диапазоны параметров вида r0=(1.0, 2.0), границы включительно,
+        None — без границы. Возвращает {'path', 'object', 'date_obs', параметр: массив float}:
+        параметры — по именам моделей (r0, Afρ0, ...), отсутствующие значения — NaN.
+        """
+        where, args = [], []
+        if object_name is not None:
+            where.append("object = ?")
+            args.append(object_name)
+        if date_from is not None:
+            where.append("date_obs >= ?")
+            args.append(str(np.datetime64(date_from, 's')))
+        if date_to is not None:
+            end = np.datetime64(date_to)
+            if np.datetime_data(end.dtype)[0] in ('Y', 'M', 'D'):
+                # «--date-to 2025-06-01» включает весь этот день
+                where.append("date_obs < ?")
+                args.append(str((end + 1).astype('datetime64[s]')))
+            else:
+                where.append("date_obs <= ?")
+                args.append(str(end.astype('datetime64[s]')))
+        for param, (low, high) in ranges.items():
+            if param not in PARAM_COLUMNS:
+                raise ValueError(f"Неизвестный параметр: {param}")
+            column = PARAM_COLUMNS[param]
+            if low is not None:
+                where.append(f"{column} >= ?")
+                args.append(float(low))
+            if high is not None:
+                where.append(f"{column} <= ?")
+                args.append(float(high))
+        if not include_errors:
+            where.append("error IS NULL")
+
+        columns = ['path', 'object', 'date_obs'] + list(PARAM_COLUMNS.values())
+        sql = f"SELECT {', '.join(columns)} FROM files"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self.connection.execute(sql + " ORDER BY date_obs, path", args).fetchall()
+
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        result = {
+            'path': np.array(values[0], dtype=object),
+            'object': np.array(values[1], dtype=object),
+            'date_obs': parse_dates(np.array(values[2], dtype=object), 's') if rows else np.array([], 'datetime64[s]'),
+        }
+        for param, column in zip(PARAM_COLUMNS, values[3:]):
+            result[param] = np.array([np.nan if v is None else v for v in column], dtype=float)
+        return result
+
+
+def run_models(columns):
+    """ Все модели для колонок query() сразу, векторно (как batch.run_models для одной строки).
+
+    Строки, где параметров модели не хватает или расстояния не положительны, получают NaN
+    (и пустой список веществ).
+    """
+    n = len(columns['path'])
+    result = {
+        'T_total': np.full(n, np.nan),
+        'sublimating': np.full(n, '', dtype=object),
+    }
+
+    r0, r_earth, T = columns['r0'], columns['r_earth'], columns['T']
+    located = np.isfinite(r0) & np.isfinite(r_earth) & (r0 > 0) & (r_earth > 0)
+    if located.any():
+        model = SublimationModel()
+        # Строки с заданной T и без неё считаются двумя вызовами сетки
+        for rows, temperature in ((located & np.isfinite(T), T), (located & ~np.isfinite(T), None)):
+            if not rows.any():
+                continue
+            grid = model.calculate_sublimation_grid(
+                r0[rows], r_earth[rows], temperature[rows] if temperature is not None else None
+            )
+            names = np.array(grid['names'], dtype=object)
+            result['T_total'][rows] = grid['T_total']
+            result['sublimating'][rows] = ['; '.join(names[column]) for column in grid['sublimating'].T]
+
+    result['N_kg'] = MassModel().mass_loss(columns['m_k'], columns['delta'], columns['r'])
+    size = SizeModel()
+    result['D_km'] = size.diameter(columns['H'], columns['pv'])
+    # Нулевой угловой размер — «не задан», как в batch.run_models
+    angular = np.where(columns['angular_size'] != 0, columns['angular_size'], np.nan)
+    result['linear_size_km'] = size.linear_size(angular)
+    return result
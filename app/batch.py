@@ -0,0 +1,106 @@
+import os
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.models import SublimationModel, MassModel, SizeModel
+from app.readers import plain_name
+
+TXT_EXTENSIONS = ('.txt',)
+FITS_EXTENSIONS = ('.fits', '.fit', '.fts')
+
+INPUT_COLUMNS = ['T', 'r0', 'r_earth', 'm_k', 'delta', 'r', 'H', 'pv', 'angular_size']
+RESULT_COLUMNS = ['T_total', 'sublimating', 'N_kg', 'D_km', 'linear_size_km']
+COLUMNS = ['file', 'error'] + INPUT_COLUMNS + RESULT_COLUMNS
+
+
+def scan_directory(directory, recursive=False):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            # Сжатые файлы (obs.txt.gz, img.fits.bz2) берутся наравне с обычными
+            if plain_name(name).lower().endswith(TXT_EXTENSIONS + FITS_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def run_models(data):
+    # Все модели, для которых в параметрах хватает значений
+    row = {}
+    if data.get('r0') is not None and data.get('r_earth') is not None:
+        names, T_total = SublimationModel().sublimating_at(data['r0'], data['r_earth'], data.get('T'))
+        row['T_total'] = T_total
+        row['sublimating'] = '; '.join(names)
+    if all(data.get(k) is not None for k in ('m_k', 'delta', 'r')):
+        row['N_kg'] = float(MassModel().mass_loss(data['m_k'], data['delta'], data['r']))
+    if data.get('H') is not None and data.get('pv') is not None:
+        size = SizeModel()
+        D = float(size.diameter(data['H'], data['pv']))
+        row['D_km'] = D if np.isfinite(D) else None
+        if data.get('angular_size'):
+            row['linear_size_km'] = float(size.linear_size(data['angular_size'], data.get('distance', 1.0)))
+    return row
+
+
+def process_file(path):
+    # Разбор одного файла параметров и расчёт; ошибка не прерывает пакет, а попадает в строку
+    row = {'file': path}
+    try:
+        model = SublimationModel()
+        if plain_name(path).lower().endswith(FITS_EXTENSIONS):
+            model.load_fits_data(path)
+        else:
+            model.load_txt_data(path)
+        data = model.data
+        row.update({k: data[k] for k in INPUT_COLUMNS if k in data})
+        row.update(run_models(data))
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def run_batch(directory, output_path, workers=None, recursive=False, progress=None):
+    """ Пакетная обработка каталога файлов параметров в пуле процессов.
+
+    progress(done, total) вызывается после каждого файла. Возвращает сводку
+    с числом файлов, ошибок и пропускной способностью.
+    """
+    paths = scan_directory(directory, recursive)
+    started = time.perf_counter()
+    rows = []
+    errors = 0
+
+    if workers == 1 or len(paths) < 2:
+        results = map(process_file, paths)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+        results = pool.map(process_file, paths, chunksize=chunksize)
+
+    try:
+        for done, row in enumerate(results, 1):
+            rows.append(row)
+            errors += 'error' in row
+            if progress:
+                progress(done, len(paths))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    seconds = time.perf_counter() - started
+    return {
+        "files": len(paths),
+        "errors": errors,
+        "seconds": seconds,
+        "files_per_second": len(paths) / seconds if seconds > 0 else float('inf'),
+    }
@@ -0,0 +1,112 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'kubsu_astro_app', 'points')
+BUDGET_BYTES = 2 * 1024 ** 3
+# Мелкие файлы разбираются быстрее, чем открываются файлы кэша
+MIN_SOURCE_BYTES = 1024 * 1024
+
+
+class PointCache:
+    """ Кэш разобранных файлов точек: массивы лежат в .npy и при повторной загрузке
+    открываются через mmap (copy-on-write) вместо повторного разбора текста.
+
+    Запись привязана к абсолютному пути, размеру и mtime исходного файла; при изменении
+    файла старая запись удаляется. Общий объём ограничен budget_bytes, первыми
+    вытесняются записи, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, directory=CACHE_DIR, budget_bytes=BUDGET_BYTES, min_source_bytes=MIN_SOURCE_BYTES):
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+        self.min_source_bytes = min_source_bytes
+
+    def _prefix(self, file_path, kind):
+        source = f"{os.path.abspath(file_path)}\0{kind}"
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()[:20]
+
+    def _entry(self, file_path, kind):
+        st = os.stat(file_path)
+        if st.st_size < self.min_source_bytes:
+            return None, None
+        prefix = self._prefix(file_path, kind)
+        version = hashlib.sha1(f"{st.st_size}\0{st.st_mtime_ns}".encode()).hexdigest()[:12]
+        return prefix, os.path.join(self.directory, f"{prefix}-{version}")
+
+    def load(self, file_path, kind):
+        # {'x': ..., 'y': ..., 'meta': {...}} или None, если записи нет
+        try:
+            _, entry = self._entry(file_path, kind)
+            if entry is None:
+                return None
+            with open(os.path.join(entry, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode='c')
+                      for name in meta['arrays']}
+            os.utime(entry)
+        except (OSError, ValueError, KeyError):
+            return None
+        arrays['meta'] = meta
+        return arrays
+
+    def store(self, file_path, kind, meta=None, **arrays):
+        # Запись собирается во временном каталоге и переименовывается целиком,
+        # так что параллельный читатель не увидит недописанные массивы
+        try:
+            prefix, entry = self._entry(file_path, kind)
+        except OSError:
+            return
+        if entry is None or os.path.isdir(entry):
+            return
+        temp = f"{entry}.tmp{os.getpid()}"
+        try:
+            os.makedirs(temp, exist_ok=True)
+            for name, values in arrays.items():
+                np.save(os.path.join(temp, f"{name}.npy"), np.ascontiguousarray(values))
+            with open(os.path.join(temp, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(dict(meta or {}, arrays=list(arrays), source=os.path.abspath(file_path)), f)
+            os.replace(temp, entry)
+        except OSError:
+            shutil.rmtree(temp, ignore_errors=True)
+            return
+        self._drop_stale(prefix, entry)
+        self.evict()
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [os.path.join(self.directory, n) for n in names if '.tmp' not in n]
+
+    def _drop_stale(self, prefix, keep):
+        # Записи того же файла с другим размером или mtime больше не понадобятся
+        for entry in self._entries():
+            if os.path.basename(entry).startswith(prefix + '-') and entry != keep:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _size(self, entry):
+        total = 0
+        for name in os.listdir(entry):
+            total += os.path.getsize(os.path.join(entry, name))
+        return total
+
+    def evict(self):
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append((os.path.getmtime(entry), self._size(entry), entry))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.budget_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
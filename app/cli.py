@@ -0,0 +1,356 @@
+""" Консольный запуск моделей без Qt и matplotlib:
+
+    python -m app.cli sublimation --params data/test_params.txt
+    python -m app.cli mass --m-k 12.3 --delta 1.2 --r 1.3 --format csv
+    python -m app.cli size --table catalog.csv --output sizes.csv
+    python -m app.cli graph --type afrho_r --points data/test_afrho_r.txt
+    python -m app.cli batch observations/ --output results.csv --workers 8
+    python -m app.cli index archive/
+    python -m app.cli query --object 12P --date-from 2024-01-01 --where r0=1:2 --format csv
+"""
+import sys
+import csv
+import json
+import argparse
+import numpy as np
+
+from app.models import SublimationModel, GraphModel, MassModel, SizeModel
+from app.point_manager import PointManager
+
+GRAPH_TYPES = {
+    'afrho_r': "Afρ от расстояния",
+    'mag_r': "Звездной величины от расстояния",
+    'afrho_date': "Afρ от даты",
+    'mag_date': "Звездной величины от даты",
+}
+
+
+def _to_builtin(value):
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _to_builtin(value.tolist())
+    if isinstance(value, np.generic):
+        return _to_builtin(value.item())
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _write(result, args):
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(_to_builtin(result), out, ensure_ascii=False, indent=2)
+            out.write('\n')
+        else:
+            rows = result if isinstance(result, list) else [result]
+            writer = csv.DictWriter(out, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({k: json.dumps(_to_builtin(v), ensure_ascii=False)
+                                 if isinstance(v, (list, dict)) else _to_builtin(v)
+                                 for k, v in row.items()})
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def _params(args, keys):
+    # Значения из файла параметров (формат load_txt_data), поверх — аргументы командной строки
+    data = {}
+    if args.params:
+        model = SublimationModel()
+        model.load_txt_data(args.params)
+        data.update(model.data)
+    for key in keys:
+        value = getattr(args, key, None)
+        if value is not None:
+            data[key] = value
+    return data
+
+
+def _require(data, keys):
+    missing = [k for k in keys if data.get(k) is None]
+    if missing:
+        raise ValueError(f"Не заданы параметры: {', '.join(missing)}")
+
+
+def _errors(text):
+    # «r0=0.1,T=5» -> {'r0': 0.1, 'T': 5.0}
+    errors = {}
+    for item in filter(None, (text or '').split(',')):
+        key, _, value = item.partition('=')
+        errors[key.strip()] = float(value)
+    return errors
+
+
+def _monte_carlo(model, values, args, catalog=None):
+    from app.uncertainty import propagate
+
+    result = propagate(model, values, _errors(args.errors), n_samples=args.samples,
+                       seed=args.seed, workers=args.workers, catalog=catalog)
+    for summary in result['outputs'].values():
+        counts, edges = summary.pop('histogram')
+        summary['histogram'] = {"counts": counts, "edges": edges}
+    return result
+
+
+def run_sublimation(args):
+    data = _params(args, ('T', 'r0', 'r_earth'))
+    _require(data, ('r0', 'r_earth'))
+    # Те же ограничения, что в calculate_sublimation: r⊕ = 0 допустимо только при заданной T
+    if data['r0'] <= 0 or data['r_earth'] < 0 or (data.get('T') is None and data['r_earth'] == 0):
+        raise ValueError("Нужно r0 > 0 и r_earth ≥ 0; r_earth = 0 допустимо только при заданной T")
+    model = SublimationModel()
+    if args.catalog:
+        model.load_catalog(args.catalog)
+
+    if args.samples:
+        return _monte_carlo('sublimation', {k: data.get(k) for k in ('r0', 'r_earth', 'T')}, args,
+                            catalog=model.catalog)
+
+    names, T_total = model.sublimating_at(data['r0'], data['r_earth'], data.get('T'))
+    result = {
+        "r0": data['r0'],
+        "r_earth": data['r_earth'],
+        "T_total": T_total,
+        "sublimating": names,
+    }
+    if args.energy_balance:
+        balance = model.equilibrium_temperature(data['r0'], exact=True)
+        result["T_eq"] = dict(zip(balance['names'], balance['T_eq']))
+    return result
+
+
+def run_mass(args):
+    model = MassModel()
+    if args.series:
+        series = model.calculate_mass_series(args.series)
+        return [
+            {"date": str(d), "N_kg": n}
+            for d, n in zip(series['dates'], series['N'])
+        ]
+
+    data = _params(args, ('m_k', 'delta', 'r'))
+    _require(data, ('m_k', 'delta', 'r'))
+    if args.samples:
+        return _monte_carlo('mass', {k: data[k] for k in ('m_k', 'delta', 'r')}, args)
+    N = float(model.mass_loss(data['m_k'], data['delta'], data['r']))
+    return {"m_k": data['m_k'], "delta": data['delta'], "r": data['r'],
+            "N_kg": N, "N_tons": N / 1000, "N_megatons": N / 1e9}
+
+
+def run_size(args):
+    model = SizeModel()
+    if args.table:
+        if not args.output:
+            raise ValueError("Для --table нужен --output")
+        stats = model.calculate_size_batch(args.table, args.output, args.chunk_size)
+        print(json.dumps(_to_builtin(stats), ensure_ascii=False), file=sys.stderr)
+        return None
+
+    data = _params(args, ('H', 'pv', 'angular_size', 'distance'))
+    _require(data, ('H', 'pv'))
+    if args.samples:
+        return _monte_carlo('size', {k: data[k] for k in ('H', 'pv')}, args)
+    D = float(model.diameter(data['H'], data['pv']))
+    if not np.isfinite(D):
+        raise ValueError("Альбедо должно быть в диапазоне (0, 1]")
+    result = {"H": data['H'], "pv": data['pv'], "D_km": D}
+    if data.get('angular_size'):
+        result["linear_size_km"] = float(model.linear_size(data['angular_size'], data.get('distance', 1.0)))
+    return result
+
+
+def _graph_rows(result):
+    x = np.asarray(result['x'])
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = np.datetime_as_string(x, unit='s')
+    return [{"x": xv, "y": yv} for xv, yv in zip(x.tolist(), np.asarray(result['y']).tolist())]
+
+
+def run_graph(args):
+    graph_type = GRAPH_TYPES[args.type]
+    manager = PointManager()
+    if args.no_cache:
+        manager.cache = None
+    if args.stream:
+        from app.readers import iter_dated_rows
+        from app.streaming import stream_graph
+
+        if args.type.endswith('_date'):
+            chunks = ((d, v[:, 0]) for d, v in iter_dated_rows(args.points, 1))
+        else:
+            chunks = manager.iter_chunks(args.points)
+        result = stream_graph(GraphModel(), chunks, graph_type, args.max_points)
+        if 'error' in result:
+            raise ValueError(result['error'])
+        print(json.dumps(_to_builtin({k: result[k] for k in ('rows', 'stats', 'fit')}),
+                         ensure_ascii=False), file=sys.stderr)
+        return _graph_rows(result)
+
+    if args.type.endswith('_date'):
+        ok, msg = manager.load_dates_from_file(args.points)
+    else:
+        ok, msg = manager.load_from_file(args.points)
+    if not ok:
+        raise ValueError(msg)
+    if msg:
+        print(msg, file=sys.stderr)
+
+    result = GraphModel().plot_graph({'x_vals': manager.x, 'y_vals': manager.y}, graph_type)
+    if 'error' in result:
+        raise ValueError(result['error'])
+    return _graph_rows(result)
+
+
+def run_batch(args):
+    from app.batch import run_batch as batch
+
+    def progress(done, total):
+        print(f"\r[{done}/{total}]", end='', file=sys.stderr, flush=True)
+
+    summary = batch(args.directory, args.output, args.workers, args.recursive, progress)
+    print(file=sys.stderr)
+    print(json.dumps(_to_builtin(summary), ensure_ascii=False), file=sys.stderr)
+    return None
+
+
+def _ranges(items):
+    # ['r0=1:2', 'H=:12'] -> {'r0': (1.0, 2.0), 'H': (None, 12.0)}
+    ranges = {}
+    for item in items or ():
+        key, _, bounds = item.partition('=')
+        low, _, high = bounds.partition(':')
+        ranges[key.strip()] = (float(low) if low.strip() else None, float(high) if high.strip() else None)
+    return ranges
+
+
+def run_index(args):
+    from app.archive import ArchiveIndex
+
+    def progress(done, total):
+        print(f"\r[{done}/{total}]", end='', file=sys.stderr, flush=True)
+
+    index = ArchiveIndex(args.db)
+    try:
+        summary = index.update(args.directory, args.workers, not args.no_recursive, progress)
+    finally:
+        index.close()
+    print(file=sys.stderr)
+    print(json.dumps(_to_builtin(summary), ensure_ascii=False), file=sys.stderr)
+    return None
+
+
+def run_query(args):
+    from app.archive import ArchiveIndex, run_models
+
+    index = ArchiveIndex(args.db)
+    try:
+        columns = index.query(args.object, args.date_from, args.date_to, **_ranges(args.where))
+    finally:
+        index.close()
+    if args.models:
+        columns.update(run_models(columns))
+    columns['date_obs'] = np.datetime_as_string(columns['date_obs'], unit='s')
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    if not rows:
+        raise ValueError("Ничего не найдено")
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description="Расчёты KUBSU Astro App без графического интерфейса")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(sub, with_params=True, with_samples=True):
+        sub.add_argument('--format', choices=('json', 'csv'), default='json')
+        sub.add_argument('--output', '-o', help="Файл результата (по умолчанию stdout)")
+        if with_params:
+            sub.add_argument('--params', help="Файл параметров вида KEY=VALUE (как в load_txt_data)")
+        if with_samples:
+            sub.add_argument('--samples', type=int, default=0, help="Число выборок Монте-Карло")
+            sub.add_argument('--errors', help="Погрешности 1σ, например r0=0.1,T=5")
+            sub.add_argument('--seed', type=int)
+            sub.add_argument('--workers', type=int)
+
+    sub = commands.add_parser('sublimation', help="Сублимирующие вещества")
+    add_common(sub)
+    sub.add_argument('--T', type=float, dest='T')
+    sub.add_argument('--r0', type=float)
+    sub.add_argument('--r-earth', type=float, dest='r_earth')
+    sub.add_argument('--catalog', help="Внешний каталог веществ (.npz/.npy)")
+    sub.add_argument('--energy-balance', action='store_true', help="Добавить равновесные температуры")
+    sub.set_defaults(func=run_sublimation)
+
+    sub = commands.add_parser('mass', help="Масса, выделяемая кометой")
+    add_common(sub)
+    sub.add_argument('--m-k', type=float, dest='m_k')
+    sub.add_argument('--delta', type=float)
+    sub.add_argument('--r', type=float)
+    sub.add_argument('--series', help="Ряд наблюдений «дата m_k Δ r»")
+    sub.set_defaults(func=run_mass)
+
+    sub = commands.add_parser('size', help="Диаметр ядра")
+    add_common(sub)
+    sub.add_argument('--H', type=float, dest='H')
+    sub.add_argument('--pv', type=float)
+    sub.add_argument('--angular-size', type=float, dest='angular_size')
+    sub.add_argument('--distance', type=float)
+    sub.add_argument('--table', help="Таблица H/pv для потоковой обработки")
+    sub.add_argument('--chunk-size', type=int, default=500000)
+    sub.set_defaults(func=run_size)
+
+    sub = commands.add_parser('graph', help="Данные для графика")
+    add_common(sub, with_params=False, with_samples=False)
+    sub.add_argument('--type', choices=sorted(GRAPH_TYPES), required=True)
+    sub.add_argument('--points', required=True, help="Файл с точками X Y")
+    sub.add_argument('--stream', action='store_true', help="Читать файл кусками и вывести прореженный вид")
+    sub.add_argument('--max-points', type=int, default=4000)
+    sub.add_argument('--no-cache', action='store_true', help="Не использовать кэш разобранных файлов")
+    sub.set_defaults(func=run_graph)
+
+    sub = commands.add_parser('batch', help="Пакетная обработка каталога файлов параметров")
+    sub.add_argument('directory')
+    sub.add_argument('--output', '-o', required=True, help="Сводная таблица CSV")
+    sub.add_argument('--workers', type=int, help="Число процессов (по умолчанию — все ядра)")
+    sub.add_argument('--recursive', '-r', action='store_true')
+    sub.set_defaults(func=run_batch)
+
+    sub = commands.add_parser('index', help="Обновить индекс архива файлов параметров и FITS")
+    sub.add_argument('directory')
+    sub.add_argument('--db', default=None, help="Файл индекса SQLite")
+    sub.add_argument('--workers', type=int, help="Число процессов (по умолчанию — все ядра)")
+    sub.add_argument('--no-recursive', action='store_true')
+    sub.set_defaults(func=run_index)
+
+    sub = commands.add_parser('query', help="Поиск файлов в индексе архива")
+    add_common(sub, with_params=False, with_samples=False)
+    sub.add_argument('--db', default=None, help="Файл индекса SQLite")
+    sub.add_argument('--object')
+    sub.add_argument('--date-from')
+    sub.add_argument('--date-to')
+    sub.add_argument('--where', action='append', help="Диапазон параметра, например r0=1:2 или H=:12")
+    sub.add_argument('--models', action='store_true', help="Добавить расчёт моделей по найденным файлам")
+    sub.set_defaults(func=run_query)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        result = args.func(args)
+    except (ValueError, OSError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    if result is not None:
+        _write(result, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
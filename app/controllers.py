@@ -1,14 +1,104 @@
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QInputDialog
+from app.views import GraphWindow, FitsColumnsDialog, resource_path
+from app.models import SublimationModel
 from app.point_manager import PointManager
-from app.views import GraphWindow
+from app.loading import BackgroundLoader
+from app.timeline import sublimation_timeline
+from app.streaming import stream_graph
+from app.readers import iter_dated_rows, plain_name, split_fields
+from app.fits_tables import FITS_EXTENSIONS, list_tables
+from app.observations import ObservationStore, VALUE_COLUMNS
 from astropy.io import fits
 import numpy as np
+import os
+
+# Файлы точек крупнее этого порога не грузятся в таблицу, а строятся потоком
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+DATE_GRAPH_TYPES = ("Afρ от даты", "Звездной величины от даты")
+# Колонки базы наблюдений (X, Y) для каждого типа графика
+STORE_AXES = {
+    "Afρ от расстояния": ('r', 'afrho'),
+    "Звездной величины от расстояния": ('delta', 'mag'),
+    "Afρ от даты": ('date', 'afrho'),
+    "Звездной величины от даты": ('date', 'mag'),
+}
+# Таблицы читаются и сжатыми: формат распознаётся по первым байтам файла
+POINT_FILES_FILTER = "Text/CSV Files (*.txt *.csv *.gz *.bz2 *.xz *.zst);;FITS таблицы (*.fits *.fit *.fts)"
+
+
+# Функции ниже выполняются в рабочем потоке BackgroundLoader и не трогают виджеты:
+# файл читается в новые объекты, которые подменяют текущие уже в потоке GUI
+
+def _read_data_file(file_path, data, catalog, progress=None):
+    model = SublimationModel(catalog)
+    model.data = dict(data)
+    if progress is not None:
+        progress(0, 0)
+    name = plain_name(file_path)
+    if name.endswith('.txt'):
+        model.load_txt_data(file_path)
+    elif name.endswith('.fits'):
+        model.load_fits_data(file_path)
+    elif name.endswith(('.npz', '.npy')):
+        model.load_catalog(file_path)
+    return model
+
+
+def _read_points(file_path, dated, progress=None):
+    manager = PointManager()
+    if dated:
+        ok, msg = manager.load_dates_from_file(file_path, progress)
+    else:
+        ok, msg = manager.load_from_file(file_path, progress)
+    return ok, msg, manager.x, manager.y, manager.y_err
+
+
+def _read_fits_points(file_path, hdu, x_column, y_column, err_column, dated, progress=None):
+    manager = PointManager()
+    ok, msg = manager.load_fits_table(file_path, hdu, x_column, y_column, err_column, dated)
+    return ok, msg, manager.x, manager.y, manager.y_err
+
+
+def _import_observations(store_path, file_path, comet, columns, progress=None):
+    # Своё соединение: объект sqlite3 нельзя передавать между потоками
+    store = ObservationStore(store_path)
+    try:
+        return store.import_file(file_path, comet, columns, progress=progress)
+    finally:
+        store.close()
+
+
+def _query_observations(model, store_path, comet, graph_type, date_from, date_to, progress=None):
+    store = ObservationStore(store_path)
+    try:
+        x, y = store.query(comet, *STORE_AXES[graph_type], date_from, date_to)
+    finally:
+        store.close()
+    if len(x) < 2:
+        return {"error": "В базе нет наблюдений кометы за этот интервал"}
+    result = model.plot_graph({'x_vals': x, 'y_vals': y}, graph_type)
+    result['rows'] = len(x)
+    return result
+
+
+def _stream_points(model, file_path, graph_type, progress=None):
+    if graph_type in DATE_GRAPH_TYPES:
+        chunks = ((dates, values[:, 0]) for dates, values in iter_dated_rows(file_path, 1, progress=progress))
+    else:
+        chunks = PointManager().iter_chunks(file_path, progress=progress)
+    return stream_graph(model, chunks, graph_type)
+
 
 class MainController:
     def __init__(self, models, view):
         self.models = models
         self.view = view
-        self.point_manager = PointManager()
+        # Буфер точек общий с вкладкой «Графики»: таблица показывает те же массивы
+        self.point_manager = self.view.tabs["graphs"].point_manager
+        # Чтение файлов идёт в пуле потоков, окно остаётся отзывчивым
+        self.loader = BackgroundLoader(self.view)
+        self.store_path = resource_path("data/observations.sqlite")
+        self.update_comets()
         self.connect_signals()
         self.data = {}
     
@@ -25,33 +115,41 @@ class MainController:
         
         # Подключение кнопок расчета для каждой вкладки
         self.view.tabs["sublimation"].calc_btn.clicked.connect(self.calculate_sublimation)
+        self.view.tabs["sublimation"].timeline_btn.clicked.connect(self.show_sublimation_timeline)
+        for widget in self.view.tabs["sublimation"].input_params.values():
+            widget.textChanged.connect(self.update_sublimation_live)
         self.view.tabs["graphs"].plot_btn.clicked.connect(self.plot_graph)
         self.view.tabs["graphs"].load_points_btn.clicked.connect(self.load_points)
         self.view.tabs["graphs"].clear_points_btn.clicked.connect(self.view.tabs["graphs"].clear_points)
+        self.view.tabs["graphs"].store_import_btn.clicked.connect(self.import_observations)
+        self.view.tabs["graphs"].store_plot_btn.clicked.connect(self.plot_from_store)
         self.view.tabs["mass"].calc_btn.clicked.connect(self.calculate_mass)
+        self.view.tabs["mass"].series_btn.clicked.connect(self.plot_mass_series)
         self.view.tabs["size"].calc_btn.clicked.connect(self.calculate_size)
     
     def load_data(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self.view, "Открыть файл данных", "", 
-            "Текстовые файлы (*.txt);;FITS файлы (*.fits)"
+            "Текстовые файлы (*.txt *.txt.gz *.txt.bz2 *.txt.xz *.txt.zst);;"
+            "FITS файлы (*.fits *.fits.gz *.fits.bz2);;Каталог веществ (*.npz *.npy)"
         )
         
         if not file_path:
             return
-            
-        try:
-            if file_path.endswith('.txt'):
-                self.models['sublimation'].load_txt_data(file_path)
-                self.data = self.models['sublimation'].data
-            elif file_path.endswith('.fits'):
-                self.models['sublimation'].load_fits_data(file_path)
-                self.data = self.models['sublimation'].data
-                
-            self.update_ui_with_data()
-            QMessageBox.information(self.view, "Успех", "Данные успешно загружены!")
-        except Exception as e:
-            QMessageBox.critical(self.view, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
+
+        model = self.models['sublimation']
+        self.loader.start(
+            "Загрузка данных...", _read_data_file, file_path, model.data, model.catalog,
+            on_done=lambda loaded: self.data_loaded(file_path, loaded),
+            on_error=lambda e: QMessageBox.critical(self.view, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
+        )
+
+    def data_loaded(self, file_path, model):
+        self.models['sublimation'] = model
+        if plain_name(file_path).endswith(('.txt', '.fits')):
+            self.data = model.data
+        self.update_ui_with_data()
+        QMessageBox.information(self.view, "Успех", "Данные успешно загружены!")
     
     def update_ui_with_data(self):
         # Вкладка "Сублимация"
@@ -107,89 +205,242 @@ class MainController:
         else:
             tab.result_text.setPlainText(result['result'])
     
-    def plot_graph(self):
-        tab = self.view.tabs["graphs"]
-        x_text, y_text = tab.get_point_texts()
+    def update_sublimation_live(self):
+        # Пересчёт по мере ввода через индекс критических расстояний;
+        # пока данные неполные, ошибки не показываются
+        tab = self.view.tabs["sublimation"]
+        input_params = {
+            'T': tab.input_params['T'].text(),
+            'r0': tab.input_params['r0'].text(),
+            'r_earth': tab.input_params['r_earth'].text()
+        }
 
-        graph_type = tab.graph_type.currentText()
+        result = self.models['sublimation'].calculate_sublimation(input_params)
 
-        params = {}
+        if 'result' in result:
+            tab.result_text.setPlainText(result['result'])
+    
+    def show_sublimation_timeline(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self.view, "Открыть эфемериды (дата, r, Δ)", "", POINT_FILES_FILTER
+        )
+        if not file_path:
+            return
 
-        if graph_type in ("Afρ от даты", "Звездной величины от даты"):
-            x_parts = self.point_manager._parse_text(x_text)
-            y_parts = self.point_manager._parse_text(y_text)
-            if not x_parts or not y_parts:
-                QMessageBox.warning(self.view, "Ошибка", "Нужно задать списки X и Y")
-                return
-            if len(x_parts) != len(y_parts) or len(x_parts) < 2:
-                QMessageBox.warning(self.view, "Ошибка", "Количество точек X и Y должно совпадать и быть не менее двух")
-                return
-            try:
-                params['x_vals'] = x_parts
-                params['y_vals'] = np.array([float(v) for v in y_parts])
-            except ValueError:
-                QMessageBox.warning(self.view, "Ошибка", "Точки Y должны быть числами")
-                return
+        tab = self.view.tabs["sublimation"]
+        T_input = tab.input_params['T'].text().strip()
+        try:
+            T = float(T_input) if T_input else None
+        except ValueError:
+            QMessageBox.warning(self.view, "Ошибка", "Проверьте введённые данные!")
+            return
+
+        # Своя модель для рабочего потока: ленивые индексы общей модели строит поток GUI
+        # (живой пересчёт), а каталог неизменяем и используется совместно
+        model = SublimationModel(self.models['sublimation'].catalog)
+        self.loader.start(
+            "Чтение эфемерид...", sublimation_timeline, model, file_path, T,
+            on_done=self.show_timeline, on_error=self.timeline_failed
+        )
+
+    def show_timeline(self, timeline):
+        window = GraphWindow(self.view)
+        window.plot_timeline(timeline)
+        window.show()
+
+    def timeline_failed(self, e):
+        if isinstance(e, ValueError):
+            QMessageBox.warning(self.view, "Ошибка", str(e) or "Проверьте введённые данные!")
         else:
-            ok, msg = self.point_manager.validate_points(x_text, y_text)
-            if ok:
-                params['x_vals'] = self.point_manager.x
-                params['y_vals'] = self.point_manager.y
+            QMessageBox.critical(self.view, "Ошибка", f"Не удалось загрузить эфемериды: {str(e)}")
+    
+    def plot_graph(self):
+        tab = self.view.tabs["graphs"]
+        graph_type = tab.graph_type.currentText()
+
+        # Точки берутся из типизированного буфера; текст разбирается, только если его правили
+        if tab.points_text_edited:
+            x_text, y_text = tab.get_point_texts()
+            if graph_type in DATE_GRAPH_TYPES:
+                ok, msg = self.point_manager.validate_date_points(x_text, y_text)
             else:
+                ok, msg = self.point_manager.validate_points(x_text, y_text)
+            if not ok:
                 QMessageBox.warning(self.view, "Ошибка", msg)
                 return
+            tab.set_points(self.point_manager.x, self.point_manager.y, from_text=True)
+        elif len(self.point_manager.x) < 2:
+            QMessageBox.warning(self.view, "Ошибка", "Нужно задать списки X и Y")
+            return
+
+        params = {'x_vals': self.point_manager.x, 'y_vals': self.point_manager.y}
+        y_err = self.point_manager.y_err
+        if y_err is not None and len(y_err) == len(self.point_manager.y):
+            params['y_err'] = y_err
         
         result = self.models['graph'].plot_graph(params, graph_type)
         
         if 'error' in result:
             QMessageBox.warning(self.view, "Ошибка", result['error'])
         else:
-            window = GraphWindow(self.view)
-            window.ax.clear()
-            window.ax.plot(result['x'], result['y'], color="blue")
-            if result.get('points'):
-                window.ax.scatter(result['x'], result['y'], color="red", zorder=3)
-            window.ax.set_xlabel(result['xlabel'])
-            window.ax.set_ylabel(result['ylabel'])
-            window.ax.set_title(result['title'])
-            window.ax.grid(True)
-            if result['invert_y']:
-                window.ax.invert_yaxis()
-            window.canvas.draw()
-            window.show()
-    
+            self.show_graph(result)
+
+    def show_graph(self, result):
+        window = GraphWindow(self.view)
+        window.ax.clear()
+        window.plot_series(result['x'], result['y'], result.get('y_err'), result.get('points'))
+        window.ax.set_xlabel(result['xlabel'])
+        window.ax.set_ylabel(result['ylabel'])
+        window.ax.set_title(result['title'])
+        window.ax.grid(True)
+        if result['invert_y']:
+            window.ax.invert_yaxis()
+        window.canvas.draw()
+        window.show()
+
+    def plot_points_stream(self, file_path, graph_type):
+        # Большой файл: точки читаются кусками, на график идёт прореженный вид
+        self.loader.start(
+            "Чтение точек...", _stream_points, self.models['graph'], file_path, graph_type,
+            on_done=self.points_streamed,
+            on_error=lambda e: QMessageBox.warning(self.view, "Ошибка", f"Не удалось прочитать файл: {e}")
+        )
+
+    def points_streamed(self, result):
+        if 'error' in result:
+            QMessageBox.warning(self.view, "Ошибка", result['error'])
+            return
+        self.show_graph(result)
+        QMessageBox.information(
+            self.view, "Загрузка точек",
+            f"Файл слишком большой для таблицы: график построен по {len(result['x'])} "
+            f"из {result['rows']} точек"
+        )
+
     def load_points(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self.view, "Открыть файл с точками", "", "Text/CSV Files (*.txt *.csv)"
+            self.view, "Открыть файл с точками", "", POINT_FILES_FILTER
         )
         if not file_path:
             return
+        graph_type = self.view.tabs["graphs"].graph_type.currentText()
+        if plain_name(file_path).lower().endswith(FITS_EXTENSIONS):
+            self.load_fits_points(file_path, graph_type)
+            return
+        if os.path.getsize(file_path) > STREAM_THRESHOLD_BYTES:
+            self.plot_points_stream(file_path, graph_type)
+            return
+        self.loader.start(
+            "Чтение точек...", _read_points, file_path, graph_type in DATE_GRAPH_TYPES,
+            on_done=self.points_loaded,
+            on_error=lambda e: QMessageBox.warning(self.view, "Ошибка", f"Не удалось прочитать файл: {e}")
+        )
+
+    def load_fits_points(self, file_path, graph_type):
+        # Таблица FITS открывается через memmap: в буфер точек идут представления колонок,
+        # так что размер таблицы на время открытия не влияет
+        try:
+            tables = list_tables(file_path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self.view, "Ошибка", f"Не удалось прочитать файл: {e}")
+            return
+        if not tables:
+            QMessageBox.warning(self.view, "Ошибка", "В файле нет таблиц BINTABLE")
+            return
+        dialog = FitsColumnsDialog(tables, self.view)
+        if not dialog.exec_():
+            return
+        self.loader.start(
+            "Чтение таблицы FITS...", _read_fits_points, file_path, *dialog.selection(),
+            graph_type in DATE_GRAPH_TYPES,
+            on_done=self.points_loaded,
+            on_error=lambda e: QMessageBox.warning(self.view, "Ошибка", f"Не удалось прочитать файл: {e}")
+        )
+
+    def points_loaded(self, loaded):
+        ok, msg, x, y, y_err = loaded
+        if not ok:
+            QMessageBox.warning(self.view, "Ошибка", msg)
+            return
+        self.view.tabs["graphs"].set_points(x, y, y_err=y_err)
+        if msg:
+            QMessageBox.information(self.view, "Загрузка точек", msg)
+
+    def update_comets(self):
+        if not os.path.exists(self.store_path):
+            return
+        store = ObservationStore(self.store_path)
+        try:
+            self.view.tabs["graphs"].set_comets(store.comets())
+        finally:
+            store.close()
+
+    def import_observations(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self.view, f"Импорт наблюдений (дата {' '.join(VALUE_COLUMNS)})", "", POINT_FILES_FILTER
+        )
+        if not file_path:
+            return
+        comet, ok = QInputDialog.getText(
+            self.view, "Импорт наблюдений", "Комета:", text=self.view.tabs["graphs"].store_comet.currentText()
+        )
+        comet = comet.strip()
+        if not ok or not comet:
+            return
+        # Колонки после даты по порядку; для рядов «дата Y» по умолчанию — Y текущего графика
+        graph_type = self.view.tabs["graphs"].graph_type.currentText()
+        default = STORE_AXES[graph_type][1] if graph_type in DATE_GRAPH_TYPES else ' '.join(VALUE_COLUMNS)
+        text, ok = QInputDialog.getText(
+            self.view, "Импорт наблюдений",
+            f"Колонки после даты ({', '.join(VALUE_COLUMNS)}), недостающие в конце строки — пустые:",
+            text=default
+        )
+        columns = tuple(split_fields(text))
+        if not ok or not columns:
+            return
+        unknown = [c for c in columns if c not in VALUE_COLUMNS]
+        if unknown or len(set(columns)) != len(columns):
+            QMessageBox.warning(self.view, "Ошибка", f"Колонки задаются без повторов из списка: {', '.join(VALUE_COLUMNS)}")
+            return
+        self.loader.start(
+            "Импорт наблюдений...", _import_observations, self.store_path, file_path, comet, columns,
+            on_done=lambda result: self.observations_imported(comet, result),
+            on_error=lambda e: QMessageBox.critical(self.view, "Ошибка", f"Не удалось импортировать наблюдения: {str(e)}")
+        )
+
+    def observations_imported(self, comet, result):
+        self.update_comets()
+        self.view.tabs["graphs"].store_comet.setCurrentText(comet)
+        message = f"Добавлено наблюдений: {result['rows']}"
+        if result['skipped']:
+            message += f"\nПропущено некорректных строк: {result['skipped']}"
+        QMessageBox.information(self.view, "Импорт наблюдений", message)
+
+    def plot_from_store(self):
         tab = self.view.tabs["graphs"]
-        graph_type = tab.graph_type.currentText()
-        if graph_type in ("Afρ от даты", "Звездной величины от даты"):
-            x_vals = []
-            y_vals = []
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    parts = line.strip().replace(";", " ").replace(",", " ").split()
-                    if len(parts) >= 2:
-                        x_vals.append(parts[0])
-                        try:
-                            y_vals.append(float(parts[1]))
-                        except ValueError:
-                            continue
-            if len(x_vals) < 2 or len(x_vals) != len(y_vals):
-                QMessageBox.warning(self.view, "Ошибка", "Некорректные данные в файле")
-                return
-            tab.set_points(x_vals, y_vals)
-            self.point_manager.x = np.array(x_vals)
-            self.point_manager.y = np.array(y_vals)
-        else:
-            ok, msg = self.point_manager.load_from_file(file_path)
-            if not ok:
-                QMessageBox.warning(self.view, "Ошибка", msg)
-                return
-            tab.set_points(self.point_manager.x, self.point_manager.y)
+        comet = tab.store_comet.currentText()
+        if not comet:
+            QMessageBox.warning(self.view, "Ошибка", "Сначала импортируйте наблюдения в базу")
+            return
+        try:
+            date_from, date_to = (np.datetime64(w.text().strip()) if w.text().strip() else None
+                                  for w in (tab.store_date_from, tab.store_date_to))
+        except ValueError:
+            QMessageBox.warning(self.view, "Ошибка", "Даты задаются в виде YYYY-MM-DD")
+            return
+        # Из базы читаются только точки кометы за интервал; таблица точек не заполняется
+        self.loader.start(
+            "Выборка из базы наблюдений...", _query_observations, self.models['graph'], self.store_path,
+            comet, tab.graph_type.currentText(), date_from, date_to,
+            on_done=self.store_plotted,
+            on_error=lambda e: QMessageBox.critical(self.view, "Ошибка", f"Не удалось прочитать базу: {str(e)}")
+        )
+
+    def store_plotted(self, result):
+        if 'error' in result:
+            QMessageBox.warning(self.view, "Ошибка", result['error'])
+            return
+        self.show_graph(result)
 
     def calculate_mass(self):
         tab = self.view.tabs["mass"]
@@ -206,6 +457,38 @@ class MainController:
         else:
             tab.result_text.setPlainText(result['result'])
     
+    def plot_mass_series(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self.view, "Открыть ряд наблюдений (дата, m_k, Δ, r)", "", POINT_FILES_FILTER
+        )
+        if not file_path:
+            return
+
+        self.loader.start(
+            "Чтение ряда наблюдений...", self.models['mass'].calculate_mass_series, file_path,
+            on_done=self.show_mass_series, on_error=self.mass_series_failed
+        )
+
+    def mass_series_failed(self, e):
+        if isinstance(e, ValueError):
+            QMessageBox.warning(self.view, "Ошибка", str(e))
+        else:
+            QMessageBox.critical(self.view, "Ошибка", f"Не удалось загрузить ряд наблюдений: {str(e)}")
+
+    def show_mass_series(self, series):
+        tab = self.view.tabs["mass"]
+        N = series['N']
+        tab.result_text.setPlainText(
+            f"Наблюдений в ряду: {len(N)}\n"
+            f"Полная масса N по наблюдениям:\n"
+            f"от {np.nanmin(N):.2e} до {np.nanmax(N):.2e} кг\n"
+            f"последнее наблюдение: {N[-1]:.2e} кг"
+        )
+
+        window = GraphWindow(self.view)
+        window.plot_mass_series(series)
+        window.show()
+
     def calculate_size(self):
         tab = self.view.tabs["size"]
         params = {
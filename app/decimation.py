@@ -0,0 +1,96 @@
+import numpy as np
+
+from app.streaming import first_match
+
+# Режимы прореживания: подпись для окна графика
+MODES = {
+    'minmax': "Мин/макс по пикселю",
+    'lttb': "LTTB",
+}
+# Ряды короче этого рисуются целиком, как есть
+MIN_POINTS = 5000
+
+
+def minmax_indices(x, y, buckets):
+    """ Индексы точек, оставляемых от каждой из buckets равных по X корзин (столбцов пикселей):
+    первая, последняя, минимум и максимум Y.
+
+    x — по возрастанию. Линия по этим точкам на экране совпадает с линией по всем точкам:
+    внутри столбца пикселей рисуется отрезок от минимума до максимума, а переходы между
+    столбцами идут через крайние точки.
+    """
+    n = len(x)
+    if n <= 4 * buckets:
+        return np.arange(n)
+    # x упорядочен, поэтому начала корзин ищутся двоичным поиском, без номера корзины у каждой точки
+    edges = x[0] + (x[-1] - x[0]) * np.arange(buckets) / buckets
+    starts = np.unique(np.searchsorted(x, edges, 'left'))
+    starts = starts[starts < n]
+    ends = np.append(starts[1:], n) - 1
+    lo = np.fmin.reduceat(y, starts)
+    hi = np.fmax.reduceat(y, starts)
+    groups = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    at_lo = first_match(groups, y == lo[groups], starts)
+    at_hi = first_match(groups, y == hi[groups], starts)
+    return np.unique(np.concatenate((starts, ends, at_lo, at_hi)))
+
+
+def lttb_indices(x, y, threshold):
+    """ Индексы threshold точек по алгоритму Largest-Triangle-Three-Buckets.
+
+    Первая и последняя точки сохраняются, остальные делятся на threshold - 2 корзины по
+    числу точек; из каждой берётся точка, образующая наибольший треугольник с точкой,
+    выбранной в предыдущей корзине, и средней точкой следующей. x — по возрастанию,
+    NaN в y не допускаются.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    # Средние X и Y каждой корзины считаются разом; для последней «следующая» — последняя точка
+    means_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges), x[-1])
+    means_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges), y[-1])
+    chosen = np.empty(threshold, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Удвоенная площадь треугольника (a, точка корзины, среднее следующей корзины)
+        area = np.abs(
+            (x[a] - means_x[i + 1]) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (means_y[i + 1] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        chosen[i + 1] = a
+    return chosen
+
+
+def decimate(x, y, pixels, mode='minmax', x_range=None):
+    """ Индексы точек ряда для отрисовки в области шириной pixels пикселей.
+
+    x — числа по возрастанию (даты — в единицах оси matplotlib). x_range=(x_min, x_max) —
+    видимый участок: берутся только его точки и по одной соседней с каждой стороны, чтобы
+    линия доходила до края области. Точки с NaN в y отбрасываются.
+    """
+    lo, hi = 0, len(x)
+    if x_range is not None:
+        lo = max(int(np.searchsorted(x, x_range[0], 'left')) - 1, 0)
+        hi = min(int(np.searchsorted(x, x_range[1], 'right')) + 1, len(x))
+    xs, ys = x[lo:hi], y[lo:hi]
+    finite = np.isfinite(ys)
+    if not finite.all():
+        keep = np.flatnonzero(finite)
+        xs, ys = xs[keep], ys[keep]
+    else:
+        keep = None
+    pixels = max(int(pixels), 1)
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим прореживания: {mode}")
+    if len(xs) <= 4 * pixels:
+        # Участок и так не гуще четырёх точек на пиксель
+        chosen = np.arange(len(xs))
+    elif mode == 'lttb':
+        chosen = lttb_indices(xs, ys, 2 * pixels)
+    else:
+        chosen = minmax_indices(xs, ys, pixels)
+    return lo + (keep[chosen] if keep is not None else chosen)
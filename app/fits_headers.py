@@ -0,0 +1,108 @@
+import io
+
+from app.readers import decompressed
+
+# Заголовок FITS — блоки по 2880 байт из карт по 80 символов; данные HDU выровнены так же
+BLOCK_BYTES = 2880
+CARD_BYTES = 80
+# Карты, нужные, чтобы перешагнуть через данные HDU и узнать его имя
+STRUCTURE_KEYS = {b'BITPIX', b'NAXIS', b'PCOUNT', b'GCOUNT', b'GROUPS', b'EXTNAME'}
+
+
+def _card_value(raw):
+    # Значение карты без комментария: число, строка в кавычках или логическое T/F
+    raw = raw.decode('ascii', 'replace').strip()
+    if raw.startswith("'"):
+        end = raw.find("'", 1)
+        while end >= 0 and raw[end + 1:end + 2] == "'":
+            end = raw.find("'", end + 2)
+        return raw[1:end].replace("''", "'").rstrip()
+    raw = raw.split('/', 1)[0].strip()
+    if raw in ('T', 'F'):
+        return raw == 'T'
+    try:
+        return int(raw)
+    except ValueError:
+        pass
+    try:
+        return float(raw.replace('D', 'E'))
+    except ValueError:
+        return None
+
+
+def _read_header(f, wanted):
+    # Карты одного заголовка: разбираются только wanted и структурные, остальные пропускаются.
+    # None — конец файла
+    cards = {}
+    while True:
+        block = f.read(BLOCK_BYTES)
+        if len(block) < BLOCK_BYTES:
+            return None
+        for start in range(0, BLOCK_BYTES, CARD_BYTES):
+            key = block[start:start + 8].rstrip()
+            if key == b'END':
+                return cards
+            if block[start + 8:start + 10] != b'= ':
+                continue
+            if key in wanted or key in STRUCTURE_KEYS or key.startswith(b'NAXIS'):
+                cards[key] = _card_value(block[start + 10:start + CARD_BYTES])
+
+
+def _data_bytes(cards):
+    # Размер данных HDU с выравниванием до блока: |BITPIX|/8 · GCOUNT · (PCOUNT + ΠNAXISn)
+    naxis = cards.get(b'NAXIS') or 0
+    if not naxis:
+        return 0
+    axes = [cards.get(b'NAXIS%d' % i) or 0 for i in range(1, naxis + 1)]
+    if cards.get(b'GROUPS') and axes[0] == 0:
+        axes = axes[1:]
+    count = 1
+    for axis in axes:
+        count *= axis
+    size = abs(cards.get(b'BITPIX') or 8) // 8 * (cards.get(b'GCOUNT') or 1) * ((cards.get(b'PCOUNT') or 0) + count)
+    return -(-size // BLOCK_BYTES) * BLOCK_BYTES
+
+
+def _skip(f, size):
+    try:
+        f.seek(size, io.SEEK_CUR)
+    except (OSError, io.UnsupportedOperation):
+        # Поток распаковки без перемотки — данные читаются и отбрасываются
+        while size > 0:
+            chunk = f.read(min(size, 1024 * 1024))
+            if not chunk:
+                break
+            size -= len(chunk)
+
+
+def read_fits_keys(file_path, keys, extensions=None, stop_at_first=True, text_keys=()):
+    """ Значения карт keys из заголовков FITS без чтения данных HDU.
+
+    Заголовки читаются по порядку, данные каждого HDU перешагиваются по размеру из
+    BITPIX/NAXISn. extensions — номера HDU (0 — первичный) или имена EXTNAME, которые
+    нужно смотреть; None — все. При stop_at_first чтение кончается на первом HDU, где нашлась
+    хотя бы одна из keys; иначе более поздние HDU перекрывают значения ранних.
+    Возвращает {ключ: значение} для числовых карт keys и строковых карт text_keys.
+    """
+    text = {k.upper().encode('ascii') for k in text_keys}
+    wanted = {k.upper().encode('ascii') for k in keys} | text
+    if extensions is not None:
+        extensions = {e.upper() if isinstance(e, str) else e for e in extensions}
+    found = {}
+    with open(file_path, 'rb') as raw, decompressed(raw) as f:
+        index = 0
+        while True:
+            cards = _read_header(f, wanted)
+            if cards is None:
+                break
+            name = str(cards.get(b'EXTNAME') or '').strip().upper()
+            if extensions is None or index in extensions or (name and name in extensions):
+                values = {k.decode(): v for k, v in cards.items()
+                          if (k in text and isinstance(v, str))
+                          or (k in wanted and isinstance(v, (int, float)) and not isinstance(v, bool))}
+                found.update(values)
+                if stop_at_first and values:
+                    break
+            _skip(f, _data_bytes(cards))
+            index += 1
+    return found
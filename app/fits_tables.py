@@ -0,0 +1,55 @@
+import numpy as np
+
+FITS_EXTENSIONS = ('.fits', '.fit', '.fts')
+# Форматы колонок BINTABLE, годные для точек: целые, вещественные и строки (даты)
+NUMERIC_FORMATS = 'BIJKED'
+
+
+def _columns(hdu):
+    # Скалярные колонки таблицы; векторные (3D и т.п.) и колонки-указатели в кучу не годятся
+    names = []
+    for column in hdu.columns:
+        code = column.format.format if hasattr(column.format, 'format') else str(column.format)[-1]
+        if code == 'A' or (code in NUMERIC_FORMATS and column.format.repeat == 1):
+            names.append(column.name)
+    return names
+
+
+def list_tables(file_path):
+    """ Таблицы BINTABLE файла: [{'hdu', 'name', 'rows', 'columns'}, ...].
+
+    Читаются только заголовки — данные таблиц не трогаются.
+    """
+    from astropy.io import fits
+
+    tables = []
+    with fits.open(file_path, memmap=True) as hdul:
+        for index, hdu in enumerate(hdul):
+            if not isinstance(hdu, fits.BinTableHDU):
+                continue
+            columns = _columns(hdu)
+            if columns:
+                tables.append({
+                    "hdu": index,
+                    "name": hdu.name or f"HDU {index}",
+                    "rows": hdu.header.get('NAXIS2', 0),
+                    "columns": columns,
+                })
+    return tables
+
+
+def read_columns(file_path, hdu, names):
+    """ Колонки таблицы как представления NumPy поверх отображённого в память файла.
+
+    Копии не создаются: страницы файла подгружаются ОС по мере обращения к значениям,
+    поэтому открытие многогигабайтной таблицы не зависит от её размера. Массивы остаются
+    действительны и после закрытия файла. Колонки с TSCAL/TZERO и строковые astropy
+    преобразует в новые массивы.
+    """
+    from astropy.io import fits
+
+    with fits.open(file_path, memmap=True) as hdul:
+        data = hdul[hdu].data
+        if data is None:
+            raise ValueError("В таблице нет строк")
+        return [np.asarray(data.field(name)) for name in names]
@@ -0,0 +1,134 @@
+import threading
+from collections import deque
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class _TaskSignals(QObject):
+    # Объект живёт в потоке GUI, поэтому сигналы из рабочего потока доходят через очередь событий
+    progress = pyqtSignal(object, object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    cancelled = pyqtSignal()
+
+
+class LoadTask(QRunnable):
+    """ Загрузка файла в пуле потоков.
+
+    func вызывается как func(*args, progress=report); report(done, total) сообщает
+    прочитанные байты (total=0 — объём неизвестен) и бросает LoadCancelled, если загрузку
+    отменили. Результат или исключение возвращаются сигналами finished/failed.
+    """
+
+    def __init__(self, func, *args):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.signals = _TaskSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def report(self, done, total=0):
+        if self._cancel.is_set():
+            raise LoadCancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            result = self.func(*self.args, progress=self.report)
+        except LoadCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            if self._cancel.is_set():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.failed.emit(e)
+            return
+        # Функции без точек отмены дорабатывают до конца, но результат отменённой загрузки не нужен
+        if self._cancel.is_set():
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(result)
+
+
+class BackgroundLoader(QObject):
+    """ Запуск LoadTask с окном прогресса и кнопкой «Отмена».
+
+    Обработчики on_done/on_error вызываются в потоке GUI, так что в них можно обновлять
+    виджеты и показывать QMessageBox. Одновременно идёт одна загрузка; запросы, пришедшие
+    во время неё, встают в очередь и запускаются по порядку, а окно прогресса показывает,
+    сколько их ждёт.
+    """
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self.task = None
+        self.dialog = None
+        self.label = ""
+        self.queue = deque()
+
+    @property
+    def busy(self):
+        return self.task is not None
+
+    def start(self, label, func, *args, on_done, on_error):
+        # Возвращает запущенную задачу; None — запрос поставлен в очередь
+        if self.busy:
+            self.queue.append((label, func, args, on_done, on_error))
+            self._show_queue()
+            return None
+        task = LoadTask(func, *args)
+        dialog = QProgressDialog(label, "Отмена", 0, 0, self.parent())
+        dialog.setWindowTitle("Загрузка")
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(300)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(task.cancel)
+
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(lambda result: self._finish(on_done, result))
+        task.signals.failed.connect(lambda error: self._finish(on_error, error))
+        task.signals.cancelled.connect(lambda: self._finish(None, None))
+
+        self.task, self.dialog, self.label = task, dialog, label
+        self._show_queue()
+        self.pool.start(task)
+        return task
+
+    def _on_progress(self, done, total):
+        if self.dialog is None:
+            return
+        if total:
+            # Проценты, а не байты: QProgressDialog считает в int, файлы бывают больше 2 ГБ
+            self.dialog.setMaximum(100)
+            self.dialog.setValue(min(100, int(done * 100 / total)))
+        else:
+            self.dialog.setMaximum(0)
+
+    def _show_queue(self):
+        if self.dialog is not None:
+            waiting = f"\nВ очереди: {len(self.queue)}" if self.queue else ""
+            self.dialog.setLabelText(self.label + waiting)
+
+    def _finish(self, handler, value):
+        self.dialog.close()
+        self.dialog.deleteLater()
+        self.task = None
+        self.dialog = None
+        try:
+            if handler is not None:
+                handler(value)
+        finally:
+            if self.queue:
+                label, func, args, on_done, on_error = self.queue.popleft()
+                self.start(label, func, *args, on_done=on_done, on_error=on_error)
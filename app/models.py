@@ -1,127 +1,43 @@
+import io
 import math
+import time
+from itertools import islice
 import numpy as np
-import pandas as pd
-from astropy.io import fits
+from app.species import SpeciesCatalog, SublimationIndex
+from app.thermal import EnergyBalanceSolver
+from app.readers import iter_dated_rows, parse_dates, decompressed
+from app.fits_headers import read_fits_keys
+
+# Ключи файлов параметров (KEY=VALUE и карты FITS) -> имена параметров моделей
+PARAM_KEYS = {
+    'T': 'T',
+    'R0': 'r0',
+    'REARTH': 'r_earth',
+    'AFRHO0': 'Afρ0',
+    'K': 'k',
+    'H': 'H',
+    'N': 'n',
+    'DELTA': 'delta',
+    'MK': 'm_k',
+    'R': 'r',
+    'PV': 'pv',
+    'ANGSIZE': 'angular_size'
+}
 
 class SublimationModel:
-    def __init__(self):
-        self.elements_db = [
-            # Летучие льды (основные компоненты комет)
-            {
-                'name': 'H₂O (водяной лёд)',
-                'H': 2.83e10,
-                'mu': 18,
-                'P0': 1e15,
-                'P_vap': lambda T: 611 * math.exp(5425*(1/273 - 1/T)),
-                'comment': 'Основной компонент кометных ядер. Сублимирует при ~150-200 K'
-            },
-            {
-                'name': 'CO₂ (сухой лёд)',
-                'H': 2.3e10,
-                'mu': 44,
-                'P0': 5.1e6,
-                'P_vap': lambda T: 5.1e6 * math.exp(3188*(1/194 - 1/T)),
-                'comment': 'Второй по распространённости лёд в кометах'
-            },
-            {
-                'name': 'CO (угарный газ)',
-                'H': 1.3e10,
-                'mu': 28,
-                'P0': 1.15e5,
-                'P_vap': lambda T: 1.15e5 * math.exp(764*(1/68 - 1/T)),
-                'comment': 'Сублимирует при очень низких температурах'
-            },
-            {
-                'name': 'CH₄ (метан)',
-                'H': 1.9e10,
-                'mu': 16,
-                'P0': 1.3e5,
-                'P_vap': lambda T: 1.3e5 * math.exp(1680*(1/91 - 1/T)),
-                'comment': 'Обнаружен в кометах 67P и Хартли 2'
-            },
-
-            # Другие органические соединения
-            {
-                'name': 'C₂H₆ (этан)',
-                'H': 2.1e10,
-                'mu': 30,
-                'P0': 2.45e5,
-                'P_vap': lambda T: 2.45e5 * math.exp(1980*(1/90 - 1/T)),
-                'comment': 'Обнаружен в комете Хейла-Боппа'
-            },
-            {
-                'name': 'CH₃OH (метанол)',
-                'H': 3.6e10,
-                'mu': 32,
-                'P0': 1.23e5,
-                'P_vap': lambda T: 1.23e5 * math.exp(4630*(1/175 - 1/T)),
-                'comment': 'Важный органический компонент'
-            },
-            {
-                'name': 'H₂CO (формальдегид)',
-                'H': 2.8e10,
-                'mu': 30,
-                'P0': 4.57e5,
-                'P_vap': lambda T: 4.57e5 * math.exp(3200*(1/134 - 1/T)),
-                'comment': 'Обнаружен в коме комет'
-            },
-
-            # Азотистые соединения
-            {
-                'name': 'NH₃ (аммиак)',
-                'H': 2.5e10,
-                'mu': 17,
-                'P0': 1e5,
-                'P_vap': lambda T: 1e5 * math.exp(2000*(1/100 - 1/T)),
-                'comment': 'Источник атомарного азота'
-            },
-            {
-                'name': 'HCN (цианистый водород)',
-                'H': 3.1e10,
-                'mu': 27,
-                'P0': 3.47e5,
-                'P_vap': lambda T: 3.47e5 * math.exp(3400*(1/150 - 1/T)),
-                'comment': 'Важен для пребиотической химии'
-            },
-
-            # Сера и её соединения
-            {
-                'name': 'H₂S (сероводород)',
-                'H': 2.7e10,
-                'mu': 34,
-                'P0': 1.23e6,
-                'P_vap': lambda T: 1.23e6 * math.exp(2800*(1/120 - 1/T)),
-                'comment': 'Основной источник серы в кометах'
-            },
-            {
-                'name': 'SO₂ (диоксид серы)',
-                'H': 3.4e10,
-                'mu': 64,
-                'P0': 3.82e5,
-                'P_vap': lambda T: 3.82e5 * math.exp(4300*(1/180 - 1/T)),
-                'comment': 'Обнаружен в комете Хейла-Боппа'
-            },
-
-            # Редкие компоненты
-            {
-                'name': 'N₂ (азот)',
-                'H': 1.2e10,
-                'mu': 28,
-                'P0': 3.5e4,
-                'P_vap': lambda T: 3.5e4 * math.exp(500*(1/63 - 1/T)),
-                'comment': 'Трудно обнаружить, но важен для эволюции комет'
-            },
-            {
-                'name': 'O₂ (кислород)',
-                'H': 1.6e10,
-                'mu': 32,
-                'P0': 2.5e4,
-                'P_vap': lambda T: 2.5e4 * math.exp(600*(1/54 - 1/T)),
-                'comment': 'Неожиданно обнаружен в комете 67P'
-            }
-        ]
+    def __init__(self, catalog=None):
+        self.catalog = catalog if catalog is not None else SpeciesCatalog.default()
+        self._index = None
+        self._index_source = None
+        self._valid = None
+        self._valid_source = None
+        self._solver = None
         self.data = {}
 
+    @property
+    def elements_db(self):
+        return self.catalog.as_elements()
+
     def calculate_sublimation(self, input_params):
         try:
             r_sun = float(input_params['r0'])
@@ -131,49 +47,24 @@ class SublimationModel:
             AU_KM = 149597870.7
             r_earth = r_earth_au * AU_KM
 
-            R_earth = 6371
-            sublimating = []
             result_lines = [
                 f"Расчётные параметры:",
                 f"- Расстояние от Солнца (r☉): {r_sun:.2f} а.е.",
                 f"- Расстояние от Земли (r⊕): {r_earth_au:.2f} а.е. ({r_earth:.2f} км)"
             ]
 
-            P_atm = 101325
+            T_input = input_params['T'].strip()
+            T = None
+            if T_input:
+                try:
+                    T = float(T_input)
+                except ValueError:
+                    return {"error": "Некорректное значение температуры T"}
 
-            for element in self.elements_db:
-                H = element.get('H')
-                mu = element.get('mu')
-                P0 = element.get('P0')
+            if r_sun <= 0 or r_earth_au < 0 or (T is None and r_earth_au == 0):
+                raise ValueError
 
-                if not all([H, mu, P0]):
-                    continue
-
-                xi = 1 + 0.02 * math.log(P0 / (6.7e14))
-                T_sub = 1.3e3 * (1 / xi) * (H / 3.2e10) * (mu / 170) * (r_sun / 1) ** -0.5 * \
-                    (1 + 0.1 / (1 + (r_earth / R_earth) ** 2))
-
-                T_input = input_params['T'].strip()
-                if T_input:
-                    try:
-                        T_total = float(T_input)
-                    except ValueError:
-                        return {"error": "Некорректное значение температуры T"}
-                else:
-                    if r_earth > 10 * R_earth:
-                        T_total = 278 / math.sqrt(r_sun)
-                    else:
-                        T_sun = 278 / math.sqrt(r_sun)
-                        T_earth = 288 * (R_earth / r_earth) ** 0.5 * (1 + 0.3)
-                        T_total = (T_sun**4 + T_earth**4)**0.25
-
-                if T_total >= T_sub:
-                    if r_earth <= 1.1 * R_earth:
-                        P_vap = element['P_vap'](T_total)
-                        if P_vap > P_atm:
-                            sublimating.append(element['name'])
-                    else:
-                        sublimating.append(element['name'])
+            sublimating, T_total = self.sublimating_at(r_sun, r_earth_au, T)
 
             result_lines.append(f"- Суммарная температура (T_total): {T_total:.2f} K")
             result_lines.append("\nСублимирующие элементы:")
@@ -186,22 +77,120 @@ class SublimationModel:
         except Exception as e:
             return {"error": f"Ошибка расчёта: {str(e)}"}
 
-    def load_txt_data(self, file_path):
-        key_map_txt = {
-            'T': 'T',
-            'R0': 'r0',
-            'REARTH': 'r_earth',
-            'AFRHO0': 'Afρ0',
-            'K': 'k',
-            'H': 'H',
-            'N': 'n',
-            'DELTA': 'delta',
-            'MK': 'm_k',
-            'R': 'r',
-            'PV': 'pv',
-            'ANGSIZE': 'angular_size'
+    def sublimation_index(self):
+        # Индекс перестраивается только при смене каталога: r⊕ и T входят в запрос
+        # одним скалярным порогом и пересортировки не требуют
+        if self._index is None or self._index_source is not self.catalog:
+            self._index = SublimationIndex(self.valid_catalog())
+            self._index_source = self.catalog
+        return self._index
+
+    def valid_catalog(self):
+        # Вещества, годные для расчёта; при недопустимых строках subset() даёт новый объект,
+        # поэтому кэш сверяется с исходным каталогом, а не с подмножеством
+        if self._valid is None or self._valid_source is not self.catalog:
+            self._valid = self.catalog.subset(self.catalog.valid_mask())
+            self._valid_source = self.catalog
+        return self._valid
+
+    def sublimating_at(self, r0, r_earth, T=None):
+        # Список сублимирующих веществ для одной точки через бинарный поиск по индексу
+        AU_KM = 149597870.7
+        R_earth = 6371
+        P_atm = 101325
+
+        r_sun = float(r0)
+        r_earth_km = float(r_earth) * AU_KM
+
+        if T is not None:
+            T_total = float(T)
+        elif r_earth_km > 10 * R_earth:
+            T_total = 278 / math.sqrt(r_sun)
+        else:
+            T_sun = 278 / math.sqrt(r_sun)
+            T_earth = 288 * (R_earth / r_earth_km) ** 0.5 * (1 + 0.3)
+            T_total = (T_sun**4 + T_earth**4)**0.25
+
+        index = self.sublimation_index()
+        grid_factor = r_sun ** -0.5 * (1 + 0.1 / (1 + (r_earth_km / R_earth) ** 2))
+        found = np.sort(index.query(T_total / grid_factor))
+
+        if r_earth_km <= 1.1 * R_earth and len(found):
+            catalog = index.catalog
+            P_vap = catalog.P_ref[found] * np.exp(catalog.A[found] * (1 / catalog.T_ref[found] - 1 / T_total))
+            found = found[P_vap > P_atm]
+
+        names = index.catalog.names
+        return [names[i] for i in found], T_total
+
+    def energy_balance_solver(self):
+        if self._solver is None or self._solver.catalog is not self.catalog:
+            self._solver = EnergyBalanceSolver(self.catalog)
+        return self._solver
+
+    def equilibrium_temperature(self, r0, exact=False):
+        # Равновесная температура поверхности каждого вещества по энергобалансу;
+        # по умолчанию — через таблицу, exact=True решает уравнение напрямую
+        solver = self.energy_balance_solver()
+        return {
+            "names": self.catalog.names,
+            "T_eq": solver.solve(r0) if exact else solver.temperature(r0),
+        }
+
+    def calculate_sublimation_grid(self, r0, r_earth, T=None):
+        # Векторный вариант calculate_sublimation: r0 и r_earth (а.е.) и необязательная T
+        # транслируются друг на друга, результат — матрица «вещество × сетка»
+        AU_KM = 149597870.7
+        R_earth = 6371
+        P_atm = 101325
+
+        catalog = self.valid_catalog()
+
+        arrays = [np.asarray(r0, dtype=float), np.asarray(r_earth, dtype=float)]
+        if T is not None:
+            arrays.append(np.asarray(T, dtype=float))
+        arrays = np.broadcast_arrays(*arrays)
+        r_sun, r_earth_km = arrays[0], arrays[1] * AU_KM
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            T_sub = catalog.t_sub(r_sun, r_earth_km, R_earth)
+
+            if T is not None:
+                T_total = np.array(arrays[2], dtype=float)
+            else:
+                T_sun = 278 / np.sqrt(r_sun)
+                T_earth = 288 * (R_earth / r_earth_km) ** 0.5 * (1 + 0.3)
+                T_total = np.where(
+                    r_earth_km > 10 * R_earth,
+                    T_sun,
+                    (T_sun**4 + T_earth**4)**0.25
+                )
+
+        sublimating = T_total >= T_sub
+
+        # У самой Земли дополнительно требуется P_vap > P_атм; такие узлы сетки редки,
+        # поэтому давление считается только для них
+        near = r_earth_km <= 1.1 * R_earth
+        if near.any():
+            sublimating[:, near] &= catalog.p_vap(T_total[near]) > P_atm
+
+        return {
+            "names": catalog.names,
+            "sublimating": sublimating,
+            "T_total": T_total,
+            "T_sub": T_sub,
         }
-        with open(file_path, 'r') as f:
+
+    def load_catalog(self, file_path):
+        # Внешний каталог веществ (.npz или .npy + .names.txt) вместо встроенного
+        self.catalog = SpeciesCatalog.load(file_path)
+        self._index = None
+        self._solver = None
+
+    def load_txt_data(self, file_path):
+        key_map_txt = PARAM_KEYS
+        # Файл может быть сжат (gzip, bz2, xz, zstd) — распаковывается на лету
+        with open(file_path, 'rb') as raw, io.TextIOWrapper(decompressed(raw)) as f:
             for line in f:
                 if '=' in line:
                     key, value = line.strip().split('=')
@@ -209,21 +198,18 @@ class SublimationModel:
                     mapped_key = key_map_txt.get(original_key, original_key)
                     self.data[mapped_key] = float(value.strip())
 
-    def load_fits_data(self, file_path):
-        key_map_fits = {
-            'T': 'T',
-            'R0': 'r0',
-            'REARTH': 'r_earth',
-            'AFRHO0': 'Afρ0',
-            'K': 'k',
-            'H': 'H',
-            'N': 'n',
-            'DELTA': 'delta',
-            'MK': 'm_k',
-            'R': 'r',
-            'PV': 'pv',
-            'ANGSIZE': 'angular_size'
-        }
+    def load_fits_data(self, file_path, extensions=None, full_scan=False):
+        # По умолчанию читаются только карты из key_map_fits и только заголовки, до первого HDU,
+        # где они нашлись; extensions ограничивает просмотр номерами HDU или EXTNAME.
+        # full_scan=True — прежний полный обход всех карт всех HDU через astropy
+        key_map_fits = PARAM_KEYS
+
+        if not full_scan:
+            values = read_fits_keys(file_path, key_map_fits, extensions)
+            self.data.update({key_map_fits[key]: value for key, value in values.items()})
+            return
+
+        from astropy.io import fits
 
         with fits.open(file_path) as hdul:
             for hdu in hdul:
@@ -237,6 +223,13 @@ class GraphModel:
     def __init__(self):
         self.data = {}
 
+    def _dates(self, x_vals):
+        # Даты приходят уже datetime64 из PointManager; строки разбираются один раз
+        dates = parse_dates(x_vals)
+        if np.isnat(dates).any():
+            raise ValueError("Некорректная дата")
+        return dates
+
     def plot_graph(self, params, graph_type):
         try:
             x_vals = params.get('x_vals')
@@ -244,15 +237,21 @@ class GraphModel:
 
             if x_vals is None or y_vals is None:
                 return {"error": "Точки не заданы"}
+            # Погрешности Y (необязательно); для log(Afρ) пересчитываются как σ / (Afρ·ln 10)
+            y_err = params.get('y_err')
+            if y_err is not None:
+                y_err = np.asarray(y_err, dtype=float)
 
+            # np.asarray: массивы из PointManager (в т.ч. отображённые из FITS) не копируются
             if graph_type == "Afρ от расстояния":
-                r = np.array(x_vals, dtype=float)
-                afrho = np.array(y_vals, dtype=float)
+                r = np.asarray(x_vals, dtype=float)
+                afrho = np.asarray(y_vals, dtype=float)
                 log_r = np.log10(r)
                 log_afrho = np.log10(afrho)
                 return {
                     "x": log_r,
                     "y": log_afrho,
+                    "y_err": y_err / (afrho * np.log(10)) if y_err is not None else None,
                     "xlabel": "log(r), а.е.",
                     "ylabel": "log(Afρ), см",
                     "title": "Зависимость log(Afρ) от log(r)",
@@ -261,12 +260,13 @@ class GraphModel:
                 }
             
             elif graph_type == "Звездной величины от расстояния":
-                d = np.array(x_vals, dtype=float)
-                m = np.array(y_vals, dtype=float)
+                d = np.asarray(x_vals, dtype=float)
+                m = np.asarray(y_vals, dtype=float)
                 log_d = np.log10(d)
                 return {
                     "x": log_d,
                     "y": m,
+                    "y_err": y_err,
                     "xlabel": "log(distance), log(pc)",
                     "ylabel": "Apparent magnitude (m)",
                     "title": "Зависимость звёздной величины от расстояния",
@@ -275,12 +275,13 @@ class GraphModel:
                 }
                 
             elif graph_type == "Afρ от даты":
-                dates = pd.to_datetime(x_vals)
-                afrho = np.array(y_vals, dtype=float)
+                dates = self._dates(x_vals)
+                afrho = np.asarray(y_vals, dtype=float)
                 log_afrho = np.log10(afrho)
                 return {
                     "x": dates,
                     "y": log_afrho,
+                    "y_err": y_err / (afrho * np.log(10)) if y_err is not None else None,
                     "xlabel": "Дата наблюдения",
                     "ylabel": "log(Afρ), см",
                     "title": "Изменение активности кометы (Afρ) во времени",
@@ -289,11 +290,12 @@ class GraphModel:
                 }
                 
             elif graph_type == "Звездной величины от даты":
-                dates = pd.to_datetime(x_vals)
-                magnitude = np.array(y_vals, dtype=float)
+                dates = self._dates(x_vals)
+                magnitude = np.asarray(y_vals, dtype=float)
                 return {
                     "x": dates,
                     "y": magnitude,
+                    "y_err": y_err,
                     "xlabel": "Дата наблюдения",
                     "ylabel": "Звёздная величина (m)",
                     "title": "Изменение звёздной величины со временем",
@@ -340,6 +342,47 @@ class MassModel:
         except Exception as e:
             return {"error": f"Произошла ошибка при расчетах: {str(e)}"}
 
+    def mass_loss(self, m_k, delta, r):
+        # Векторный вариант формулы из calculate_mass: N [кг] для массивов m_k, Δ, r
+        m_k = np.asarray(m_k, dtype=float)
+        delta = np.asarray(delta, dtype=float)
+        r = np.asarray(r, dtype=float)
+
+        m_nk = -13.78
+        f_c2 = 0.031
+
+        with np.errstate(over='ignore'):
+            numerator = 10**(-0.4 * (m_k - m_nk)) * delta**2 * r**2
+        denominator = 1.37 * 10**(-26) * f_c2
+        return numerator / denominator
+
+    def iter_mass_series(self, chunks):
+        # Потоковый расчёт по ряду наблюдений: chunks — куски (даты, m_k, Δ, r) в порядке времени.
+        # N — та же полная масса [кг], что в calculate_mass, для каждого наблюдения; это не темп,
+        # поэтому по времени N не интегрируется. Даты должны идти по неубыванию
+        last_t = None
+        for dates, m_k, delta, r in chunks:
+            t = dates.astype('datetime64[s]')
+            if len(t) and ((last_t is not None and t[0] < last_t) or (np.diff(t) < np.timedelta64(0, 's')).any()):
+                raise ValueError("Даты в ряду наблюдений должны идти по возрастанию")
+            if len(t):
+                last_t = t[-1]
+            yield {"dates": dates, "N": self.mass_loss(m_k, delta, r)}
+
+    def calculate_mass_series(self, file_path, chunk_size=50000, progress=None):
+        # Ряд «дата m_k Δ r» из файла: N [кг] для каждого наблюдения
+        chunks = (
+            (dates, values[:, 0], values[:, 1], values[:, 2])
+            for dates, values in iter_dated_rows(file_path, 3, chunk_size, progress)
+        )
+        parts = list(self.iter_mass_series(chunks))
+        if not parts:
+            raise ValueError("В файле нет строк вида «дата m_k Δ r»")
+        return {
+            "dates": np.concatenate([p['dates'] for p in parts]),
+            "N": np.concatenate([p['N'] for p in parts]),
+        }
+
 class SizeModel:
     def __init__(self):
         self.data = {}
@@ -375,4 +418,139 @@ class SizeModel:
         except ValueError as e:
             return {"error": str(e)}
         except Exception as e:
-            return {"error": f"Произошла ошибка: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Произошла ошибка: {str(e)}"}
+
+    def diameter(self, H, pv):
+        # Векторный вариант: D [км]; для альбедо вне (0, 1] — NaN
+        H = np.asarray(H, dtype=float)
+        pv = np.asarray(pv, dtype=float)
+        valid = (pv > 0) & (pv <= 1)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            D = 1329 / np.sqrt(pv) * 10**(-0.2 * H)
+        return np.where(valid, D, np.nan)
+
+    def linear_size(self, angular_size, distance=1.0):
+        # Линейный размер [км] по угловому размеру ["] и расстоянию [а.е.]
+        angular_size = np.asarray(angular_size, dtype=float)
+        distance_km = np.asarray(distance, dtype=float) * 149.6e6
+        return distance_km * np.tan(np.radians(angular_size / 3600))
+
+    @staticmethod
+    def _split_fields(line, sep):
+        return line.split() if sep == r'\s+' else [v.strip() for v in line.rstrip('\r\n').split(sep)]
+
+    @staticmethod
+    def _split_rows(lines, sep, names):
+        import pandas as pd
+
+        rows = []
+        for line in lines:
+            fields = SizeModel._split_fields(line, sep)
+            if len(fields) > len(names):
+                fields = []
+            rows.append(fields + [None] * (len(names) - len(fields)))
+        return pd.DataFrame(rows, columns=names)
+
+    @staticmethod
+    def _row_text(line, sep, out_sep, width):
+        # Исходные значения строки без переформатирования, но ровно по ширине заголовка:
+        # лишние поля отбрасываются, недостающие — nan, чтобы D_km стояла в своей колонке
+        if sep != r'\s+' and line.count(sep) == width - 1:
+            # Обычная строка нужной ширины — как есть, без разбиения
+            return line.rstrip('\r\n')
+        fields = SizeModel._split_fields(line, sep)
+        return out_sep.join(fields[:width] + ['nan'] * (width - len(fields)))
+
+    def calculate_size_batch(self, input_path, output_path, chunk_size=500000):
+        # Потоковый расчёт диаметров по таблице H, pv [, angular_size, distance]:
+        # входной файл читается кусками по chunk_size строк, к каждой строке дописываются
+        # D_km (и linear_size_km) и кусок сразу уходит в выходной файл — память ограничена
+        # размером куска, а исходные значения не переформатируются
+        import pandas as pd
+
+        column_aliases = {
+            'H': 'H',
+            'PV': 'pv',
+            'ANGSIZE': 'angular_size',
+            'ANGULAR_SIZE': 'angular_size',
+            'DISTANCE': 'distance',
+            'DELTA': 'distance',
+        }
+
+        rows = 0
+        invalid = 0
+        peak_bytes = 0
+        started = time.perf_counter()
+
+        with open(input_path, 'r', encoding='utf-8') as f, \
+                open(output_path, 'w', encoding='utf-8', newline='') as out:
+            first_line = f.readline()
+            if ';' in first_line:
+                sep, out_sep = ';', ';'
+            elif ',' in first_line:
+                sep, out_sep = ',', ','
+            else:
+                sep, out_sep = r'\s+', ' '
+            first_fields = first_line.split() if out_sep == ' ' else [v.strip() for v in first_line.split(sep)]
+
+            try:
+                [float(v) for v in first_fields]
+                names = ['H', 'pv', 'angular_size', 'distance'][:len(first_fields)]
+                names += [f'col{i}' for i in range(len(names), len(first_fields))]
+                pending = [first_line]
+                header = out_sep.join(names)
+            except ValueError:
+                names = [column_aliases.get(v.upper(), v) for v in first_fields]
+                pending = []
+                header = first_line.rstrip('\r\n')
+            if 'H' not in names or 'pv' not in names:
+                raise ValueError("В таблице должны быть колонки H и pv")
+
+            extra = ['D_km'] + (['linear_size_km'] if 'angular_size' in names else [])
+            out.write(header + out_sep + out_sep.join(extra) + '\n')
+
+            while True:
+                lines = pending + list(islice(f, chunk_size - len(pending)))
+                pending = []
+                # Конец файла — пустой кусок islice; кусок из одних пустых строк просто пропускается
+                if not lines:
+                    break
+                lines = [line for line in lines if line.strip()]
+                if not lines:
+                    continue
+
+                try:
+                    table = pd.read_csv(
+                        io.StringIO(''.join(lines)), sep=sep, header=None, names=names, engine='c'
+                    )
+                except pd.errors.ParserError:
+                    # Строка с лишними полями: кусок разбирается построчно, такие строки
+                    # получают NaN и считаются некорректными
+                    table = self._split_rows(lines, sep, names)
+                # Нечисловые значения становятся NaN и считаются некорректными строками
+                def column(name):
+                    return pd.to_numeric(table[name], errors='coerce').to_numpy(dtype=float)
+
+                columns = [self.diameter(column('H'), column('pv'))]
+                if 'angular_size' in names:
+                    distance = column('distance') if 'distance' in names else 1.0
+                    columns.append(self.linear_size(column('angular_size'), distance))
+
+                formatted = [[f'{v:.6g}' for v in values.tolist()] for values in columns]
+                out.write(''.join(
+                    self._row_text(line, sep, out_sep, len(names)) + out_sep + out_sep.join(values) + '\n'
+                    for line, values in zip(lines, zip(*formatted))
+                ))
+
+                rows += len(lines)
+                invalid += int(np.isnan(columns[0]).sum())
+                peak_bytes = max(peak_bytes, sum(len(line) for line in lines) + int(table.memory_usage().sum()))
+
+        seconds = time.perf_counter() - started
+        return {
+            "rows": rows,
+            "invalid": invalid,
+            "seconds": seconds,
+            "rows_per_second": rows / seconds if seconds > 0 else float('inf'),
+            "peak_chunk_bytes": peak_bytes,
+        }
\ No newline at end of file
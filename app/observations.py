@@ -0,0 +1,140 @@
+import os
+import sqlite3
+
+import numpy as np
+
+from app.readers import iter_padded_rows
+
+# Колонки наблюдения после даты — в этом же порядке они идут в импортируемых файлах
+VALUE_COLUMNS = ('r', 'delta', 'mag', 'afrho', 'aperture')
+# Строк за одно чтение курсора при выборке точек для графика
+FETCH_ROWS = 65536
+
+
+class ObservationStore:
+    """ База наблюдений комет (SQLite): дата, r, Δ, m, Afρ, апертура.
+
+    Строки лежат в таблице с индексом (комета, дата), поэтому выборка одной кометы за
+    интервал дат — проход по диапазону индекса, а не по всей таблице. Даты хранятся целыми
+    секундами Unix, пропущенные значения — NULL.
+    """
+
+    def __init__(self, path):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # WAL: чтение для графиков не ждёт окончания идущего импорта
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create()
+
+    def _create(self):
+        values = ', '.join(f"{name} REAL" for name in VALUE_COLUMNS)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS comets (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)"
+            )
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS observations (comet_id INTEGER NOT NULL, date INTEGER NOT NULL, {values})"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS observations_comet_date ON observations (comet_id, date)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS observations_date ON observations (date)")
+
+    def close(self):
+        self.connection.close()
+
+    def comets(self):
+        return [name for name, in self.connection.execute("SELECT name FROM comets ORDER BY name")]
+
+    def _comet_id(self, comet):
+        self.connection.execute("INSERT OR IGNORE INTO comets (name) VALUES (?)", (comet,))
+        return self.connection.execute("SELECT id FROM comets WHERE name = ?", (comet,)).fetchone()[0]
+
+    def _insert(self, comet_id, dates, values):
+        # dates — datetime64, values — колонки VALUE_COLUMNS; NaN уходит в базу как NULL
+        seconds = np.asarray(dates).astype('datetime64[s]').astype(np.int64)
+        rows = zip(
+            np.full(len(seconds), comet_id).tolist(), seconds.tolist(),
+            *(np.asarray(values[name], dtype=float).tolist() for name in VALUE_COLUMNS)
+        )
+        self.connection.executemany(
+            f"INSERT INTO observations (comet_id, date, {', '.join(VALUE_COLUMNS)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(VALUE_COLUMNS))})",
+            rows
+        )
+        return len(seconds)
+
+    def insert(self, comet, dates, **values):
+        # Массивы наблюдений одной кометы; недостающие колонки — NULL
+        n = len(dates)
+        values = {name: values.get(name, np.full(n, np.nan)) for name in VALUE_COLUMNS}
+        with self.connection:
+            return self._insert(self._comet_id(comet), dates, values)
+
+    def import_file(self, file_path, comet, columns=VALUE_COLUMNS, progress=None):
+        """ Импорт файла «дата v1 ... vN» (columns — имена колонок после даты) одной транзакцией.
+
+        Строки могут быть короче columns: недостающие значения в конце записываются как NULL,
+        так что «дата mag» импортируется с columns=('mag',) или как первые колонки полного набора.
+        Файл читается кусками, в памяти держится один кусок.
+        Возвращает {'rows': добавлено, 'skipped': пропущено строк}.
+        """
+        unknown = set(columns) - set(VALUE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Неизвестные колонки: {', '.join(sorted(unknown))}")
+        if not columns or len(set(columns)) != len(columns):
+            raise ValueError("Колонки должны быть заданы и не повторяться")
+        count = skipped = 0
+        with self.connection:
+            comet_id = self._comet_id(comet)
+            for dates, chunk, bad in iter_padded_rows(file_path, len(columns), progress=progress):
+                skipped += bad
+                values = {name: np.full(len(dates), np.nan) for name in VALUE_COLUMNS}
+                values.update(zip(columns, chunk.T))
+                count += self._insert(comet_id, dates, values)
+        return {"rows": count, "skipped": skipped}
+
+    def query(self, comet, x, y, date_from=None, date_to=None):
+        """ Точки (x, y) одной кометы для графика, по возрастанию даты.
+
+        x — 'date' или колонка VALUE_COLUMNS, y — колонка. Строки с пустым x или y
+        пропускаются. Даты возвращаются как datetime64[s].
+        """
+        for column in (x, y):
+            if column != 'date' and column not in VALUE_COLUMNS:
+                raise ValueError(f"Неизвестная колонка: {column}")
+        where = ["o.comet_id = (SELECT id FROM comets WHERE name = ?)", f"o.{y} IS NOT NULL"]
+        args = [comet]
+        if x != 'date':
+            where.append(f"o.{x} IS NOT NULL")
+        if date_from is not None:
+            where.append("o.date >= ?")
+            args.append(int(np.datetime64(date_from, 's').astype(np.int64)))
+        if date_to is not None:
+            end = np.datetime64(date_to)
+            if np.datetime_data(end.dtype)[0] in ('Y', 'M', 'D'):
+                # Дата без времени включает весь день
+                end = end + 1
+                where.append("o.date < ?")
+            else:
+                where.append("o.date <= ?")
+            args.append(int(end.astype('datetime64[s]').astype(np.int64)))
+
+        cursor = self.connection.execute(
+            f"SELECT o.{x}, o.{y} FROM observations o WHERE {' AND '.join(where)} ORDER BY o.date", args
+        )
+        # Строки читаются порциями прямо в массив: список кортежей на всю выборку не создаётся.
+        # Даты целые, значения — вещественные, поэтому у порции составной тип
+        dtype = np.dtype([('x', np.int64 if x == 'date' else float), ('y', float)])
+        chunks = [np.empty(0, dtype)]
+        while True:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            chunks.append(np.fromiter(rows, dtype, len(rows)))
+        values = np.concatenate(chunks)
+        x_vals = values['x'].astype('datetime64[s]') if x == 'date' else values['x']
+        return x_vals, values['y']
@@ -0,0 +1,92 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer
+
+DEBOUNCE_MS = 500
+
+
+def _replace_atomically(path, write):
+    # Запись во временный файл рядом и os.replace: читатель видит либо старый файл, либо новый
+    temp = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(temp, 'wb') as f:
+            write(f)
+        os.replace(temp, path)
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def points_path(params_path):
+    # data/params_afrho_r.json -> data/params_afrho_r.points.npy
+    return os.path.splitext(params_path)[0] + '.points.npy'
+
+
+def load_points(params_path):
+    # Точки из бинарного файла рядом с параметрами. Без mmap: открытый отображением файл
+    # на Windows нельзя заменить через os.replace при следующем сохранении
+    path = points_path(params_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = np.load(path)
+        return np.ascontiguousarray(table['x']), np.ascontiguousarray(table['y'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _pack_points(x, y):
+    table = np.empty(len(x), dtype=[('x', np.asarray(x).dtype), ('y', np.float64)])
+    table['x'] = x
+    table['y'] = y
+    return table
+
+
+class ParamsStore(QObject):
+    """ Отложенное сохранение параметров графиков.
+
+    schedule() только запоминает последнее состояние и перезапускает таймер, поэтому
+    частые изменения сливаются в одну запись. Запись идёт в отдельном потоке: параметры —
+    в JSON, точки — в бинарный .points.npy рядом, и только если точки менялись.
+    """
+
+    def __init__(self, parent=None, delay_ms=DEBOUNCE_MS):
+        super().__init__(parent)
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._write_pending)
+
+    def schedule(self, path, params, points=None):
+        # points — (x, y), если точки изменились с прошлой записи; иначе пишется только JSON
+        pending = self._pending.setdefault(path, {})
+        pending['params'] = params
+        if points is not None:
+            pending['points'] = points
+        self._timer.start()
+
+    def _write_pending(self):
+        # Снимок точек делается здесь, в потоке GUI: пока идёт запись, таблица может их править
+        for path, pending in self._pending.items():
+            points = pending.get('points')
+            table = _pack_points(*points) if points is not None else None
+            self._executor.submit(self._write, path, pending['params'], table)
+        self._pending = {}
+
+    @staticmethod
+    def _write(path, params, table):
+        if table is not None:
+            _replace_atomically(points_path(path), lambda f: np.save(f, table))
+        data = json.dumps(params, ensure_ascii=False, indent=2).encode('utf-8')
+        _replace_atomically(path, lambda f: f.write(data))
+
+    def flush(self):
+        # Записать всё отложенное и дождаться окончания (при закрытии окна)
+        self._timer.stop()
+        self._write_pending()
+        self._executor.submit(lambda: None).result()
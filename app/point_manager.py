@@ -1,9 +1,25 @@
+import io
+import os
 import numpy as np
 
+from app.cache import PointCache
+from app.readers import parse_dates, decompressed
+
+# Табуляция, ';', ',' и '\r' в файлах точек — те же разделители, что и пробел
+SEPARATORS = bytes.maketrans(b'\t;,\r', b'    ')
+# Блок разбора: на меньших блоках заметна цена каждого вызова read_csv
+BLOCK_BYTES = 16 * 1024 * 1024
+MIN_BLOCK_BYTES = 16 * 1024
+
 class PointManager:
     def __init__(self):
         self.x = np.array([])
         self.y = np.array([])
+        # Погрешности Y (из таблиц FITS) или None
+        self.y_err = None
+        self.skipped_lines = 0
+        # Кэш разобранных файлов; None — всегда разбирать текст заново
+        self.cache = PointCache()
 
     def _parse_text(self, text: str):
         text = text.strip()
@@ -29,27 +45,222 @@ class PointManager:
             self.y = np.array([float(v) for v in y_parts])
         except ValueError:
             return False, "Точки должны быть числами"
+        self.y_err = None
         return True, ""
 
-    def load_from_file(self, file_path: str):
+    def validate_date_points(self, x_text: str, y_text: str):
+        x_parts = self._parse_text(x_text)
+        y_parts = self._parse_text(y_text)
+        if not x_parts or not y_parts:
+            return False, "Нужно задать списки X и Y"
+        if len(x_parts) != len(y_parts) or len(x_parts) < 2:
+            return False, "Количество точек X и Y должно совпадать и быть не менее двух"
+        try:
+            y = np.array([float(v) for v in y_parts])
+        except ValueError:
+            return False, "Точки Y должны быть числами"
+        x = parse_dates(x_parts)
+        if np.isnat(x).any():
+            return False, "Некорректные даты в точках X"
+        self.x, self.y, self.y_err = x, y, None
+        return True, ""
+
+    def _parse_lines(self, block: bytes):
+        # Построчный разбор — только для блоков с мусорными строками
         x_vals = []
         y_vals = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.replace(';', ',').replace(',', ' ').split()
-                if len(parts) >= 2:
-                    try:
-                        x_vals.append(float(parts[0]))
-                        y_vals.append(float(parts[1]))
-                    except ValueError:
+        skipped = 0
+        for line in block.split(b'\n'):
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                x, y = float(parts[0]), float(parts[1])
+            except (ValueError, IndexError):
+                skipped += 1
+                continue
+            x_vals.append(x)
+            y_vals.append(y)
+        return np.array(x_vals), np.array(y_vals), skipped
+
+    def _parse_block(self, block: bytes):
+        # Блок без мусора разбирает C-парсер pandas; если он споткнулся, блок делится пополам,
+        # и построчно разбираются только маленькие куски вокруг плохих строк
+        import pandas as pd
+
+        try:
+            table = pd.read_csv(
+                io.BytesIO(block), sep=r'\s+', header=None, dtype=np.float64,
+                na_filter=False, engine='c'
+            )
+            if table.shape[1] >= 2:
+                # Колонки по отдельности: без промежуточной двумерной копии всей таблицы
+                return table[0].to_numpy(), table[1].to_numpy(), 0
+        except ValueError:
+            pass
+        middle = block.find(b'\n', len(block) // 2)
+        if len(block) <= MIN_BLOCK_BYTES or middle < 0:
+            return self._parse_lines(block)
+        left = self._parse_block(block[:middle + 1])
+        right = self._parse_block(block[middle + 1:])
+        return np.concatenate((left[0], right[0])), np.concatenate((left[1], right[1])), left[2] + right[2]
+
+    def iter_chunks(self, file_path: str, block_bytes=BLOCK_BYTES, progress=None):
+        # Поток кусков (x, y) по ~block_bytes байт файла: в памяти держится один кусок,
+        # поэтому размер файла не ограничен объёмом RAM. Разделители ';' и ',' равноценны
+        # пробелу, берутся первые два числа строки; пропущенные строки копятся в skipped_lines.
+        # progress(прочитано_байт, всего_байт) вызывается после каждого блока
+        self.skipped_lines = 0
+        tail = b''
+        with open(file_path, 'rb') as raw, decompressed(raw) as f:
+            total = os.fstat(raw.fileno()).st_size
+            while True:
+                data = f.read(block_bytes)
+                if progress is not None:
+                    progress(raw.tell(), total)
+                if not data:
+                    block, tail = tail, b''
+                else:
+                    cut = data.rfind(b'\n') + 1
+                    if not cut:
+                        tail += data
                         continue
-        self.x = np.array(x_vals)
-        self.y = np.array(y_vals)
-        if len(self.x) < 2 or len(self.x) != len(self.y):
+                    block, tail = tail + data[:cut], data[cut:]
+                if block:
+                    # Пробелы и табуляции C-парсер понимает сам; копия с заменой — только при ';' и ','
+                    if b';' in block or b',' in block:
+                        block = block.translate(SEPARATORS)
+                    x, y, skipped = self._parse_block(block)
+                    self.skipped_lines += skipped
+                    if len(x):
+                        yield x, y
+                if not data:
+                    break
+
+    def _load_cached(self, file_path: str, kind: str):
+        cached = self.cache.load(file_path, kind) if self.cache is not None else None
+        if cached is None:
+            return False
+        self.x, self.y, self.y_err = cached['x'], cached['y'], None
+        self.skipped_lines = cached['meta'].get('skipped_lines', 0)
+        return True
+
+    def _store_cached(self, file_path: str, kind: str):
+        if self.cache is not None:
+            self.cache.store(file_path, kind, {'skipped_lines': self.skipped_lines}, x=self.x, y=self.y)
+
+    def load_from_file(self, file_path: str, progress=None):
+        if not self._load_cached(file_path, 'points'):
+            chunks = list(self.iter_chunks(file_path, progress=progress))
+            self.x = np.concatenate([x for x, _ in chunks]) if chunks else np.array([])
+            self.y = np.concatenate([y for _, y in chunks]) if chunks else np.array([])
+            self.y_err = None
+            if len(self.x) < 2 or len(self.x) != len(self.y):
+                return False, "Некорректные данные в файле"
+            self._store_cached(file_path, 'points')
+        if self.skipped_lines:
+            return True, f"Пропущено некорректных строк: {self.skipped_lines}"
+        return True, ""
+
+    def _read_dated_table(self, data: bytes):
+        # Ровная таблица «дата [время] y ...» целиком через C-парсер pandas; None — файл рваный
+        import pandas as pd
+
+        try:
+            table = pd.read_csv(io.BytesIO(data), sep=r'\s+', header=None, engine='c')
+        except ValueError:
+            return None
+        if table.shape[1] < 2:
+            return None
+        dates = table[0]
+        y = pd.to_numeric(table[1], errors='coerce')
+        # «2025-06-01 12:30 100.0» — время идёт вторым полем, значение третьим
+        if table.shape[1] >= 3 and not pd.api.types.is_numeric_dtype(table[1]):
+            with_time = table[1].astype(str).str.contains(':') & table[2].notna()
+            if with_time.any():
+                dates = dates.astype(str).where(~with_time, dates.astype(str) + ' ' + table[1])
+                y = y.where(~with_time, pd.to_numeric(table[2], errors='coerce'))
+        return dates.to_numpy(), y.to_numpy(dtype=float)
+
+    def _read_dated_lines(self, data: bytes):
+        dates = []
+        y_vals = []
+        for line in data.split(b'\n'):
+            parts = line.split()
+            if not parts:
+                continue
+            with_time = len(parts) >= 3 and b':' in parts[1]
+            try:
+                y = float(parts[2 if with_time else 1])
+            except (ValueError, IndexError):
+                y = np.nan
+            dates.append(parts[0] + b' ' + parts[1] if with_time else parts[0])
+            y_vals.append(y)
+        return np.array(dates, dtype=bytes), np.array(y_vals, dtype=float)
+
+    def _read_file(self, file_path: str, progress=None):
+        # Файл целиком (сжатый — распакованным), но блоками — чтобы сообщать прогресс
+        # и успевать отменить загрузку
+        with open(file_path, 'rb') as raw, decompressed(raw) as f:
+            total = os.fstat(raw.fileno()).st_size
+            if progress is None:
+                return f.read()
+            blocks = []
+            while True:
+                block = f.read(BLOCK_BYTES)
+                progress(raw.tell(), total)
+                if not block:
+                    return b''.join(blocks)
+                blocks.append(block)
+
+    def load_dates_from_file(self, file_path: str, progress=None):
+        # Для графиков от даты: X — datetime64[ns] (ISO-дата, дата со временем, JD или MJD),
+        # даты разбираются один раз здесь и дальше не превращаются обратно в строки
+        if not self._load_cached(file_path, 'datetime64'):
+            data = self._read_file(file_path, progress).translate(SEPARATORS)
+            table = self._read_dated_table(data)
+            dates, y = table if table is not None else self._read_dated_lines(data)
+            x = parse_dates(dates)
+            valid = ~np.isnat(x) & ~np.isnan(y)
+            self.x = x[valid]
+            self.y = y[valid]
+            self.y_err = None
+            self.skipped_lines = int((~valid).sum())
+            if len(self.x) < 2:
+                return False, "Некорректные данные в файле"
+            self._store_cached(file_path, 'datetime64')
+        if self.skipped_lines:
+            return True, f"Пропущено некорректных строк: {self.skipped_lines}"
+        return True, ""
+
+    def load_fits_table(self, file_path: str, hdu: int, x_column: str, y_column: str,
+                        err_column=None, dated=False):
+        # Колонки таблицы BINTABLE без копирования — представления поверх отображённого файла.
+        # Файл при открытии не просматривается: NaN в значениях остаются в буфере и
+        # отбрасываются при построении, только для видимого участка. Копия делается лишь
+        # для дат (dated): строки без даты убираются сразу, раз колонка всё равно разбирается
+        from app.fits_tables import read_columns
+
+        names = [x_column, y_column] + ([err_column] if err_column else [])
+        columns = read_columns(file_path, hdu, names)
+        x, y = columns[0], columns[1]
+        y_err = columns[2] if err_column else None
+        not_numeric = [c for c in columns[1:] + ([] if dated else [x]) if not np.issubdtype(c.dtype, np.number)]
+        if not_numeric:
+            return False, "Колонки X, Y и погрешностей должны быть числовыми"
+        self.skipped_lines = 0
+        if dated:
+            x = parse_dates(x)
+            dated_rows = ~np.isnat(x)
+            self.skipped_lines = int(len(x) - np.count_nonzero(dated_rows))
+            if self.skipped_lines:
+                x, y = x[dated_rows], y[dated_rows]
+                y_err = y_err[dated_rows] if y_err is not None else None
+        self.x, self.y, self.y_err = x, y, y_err
+        if len(self.x) < 2:
             return False, "Некорректные данные в файле"
+        if self.skipped_lines:
+            return True, f"Пропущено строк с некорректной датой: {self.skipped_lines}"
         return True, ""
 
     def get_plot_data(self):
@@ -0,0 +1,92 @@
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from app.readers import parse_dates
+
+
+class PointsTableModel(QAbstractTableModel):
+    """ Таблица точек поверх массивов PointManager.x/y без копирования.
+
+    QTableView запрашивает только видимые ячейки, поэтому открытие таблицы на сотни
+    тысяч точек не создаёт ни одного объекта на строку. Правка ячейки пишется прямо
+    в массив менеджера на место и сообщается сигналом pointsEdited.
+    """
+
+    pointsEdited = pyqtSignal()
+
+    HEADERS = ("X", "Y")
+
+    def __init__(self, point_manager, parent=None):
+        super().__init__(parent)
+        self.point_manager = point_manager
+
+    @property
+    def x(self):
+        return self.point_manager.x
+
+    @property
+    def y(self):
+        return self.point_manager.y
+
+    def reset(self):
+        # Вызывается после замены массивов в менеджере
+        self.beginResetModel()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else min(len(self.x), len(self.y))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def _column(self, column):
+        return self.x if column == 0 else self.y
+
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, np.datetime64):
+            return np.datetime_as_string(value, unit='auto')
+        if isinstance(value, np.generic):
+            return str(value.item())
+        return str(value)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self.format_value(self._column(index.column())[index.row()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        values = self._column(index.column())
+        text = str(value).strip().replace(',', '.')
+        try:
+            if np.issubdtype(values.dtype, np.datetime64):
+                parsed = parse_dates([text])[0]
+                if np.isnat(parsed):
+                    return False
+            else:
+                parsed = float(text)
+        except ValueError:
+            return False
+
+        if not values.flags.writeable:
+            # Массив только для чтения (например, из кэша) — правки идут в собственную копию
+            values = values.copy()
+            setattr(self.point_manager, 'x' if index.column() == 0 else 'y', values)
+        values[index.row()] = parsed
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.pointsEdited.emit()
+        return True
@@ -0,0 +1,257 @@
+import io
+import os
+from itertools import islice
+import numpy as np
+
+# Юлианская дата эпохи Unix 1970-01-01T00:00 и модифицированная юлианская дата той же эпохи
+JD_UNIX_EPOCH = 2440587.5
+MJD_UNIX_EPOCH = 40587.0
+# Числа больше этого считаются JD, меньше — MJD
+JD_THRESHOLD = 1e6
+NS_PER_DAY = 86400 * 10**9
+# Правдоподобные даты наблюдений (дни от 1970-01-01): 1800-01-01 .. 2200-01-01. Числа за этими
+# пределами — не JD/MJD; заодно не переполняется datetime64[ns]
+DAYS_MIN = -62091
+DAYS_MAX = 84006
+# MJD меньше 15020 (1900-01-01) не принимаются: иначе маленькие числа (r, Δ из файла точек,
+# открытого не для того графика) молча становятся датами XIX века
+MJD_MIN = 15020
+# Начало даты ISO: такие строки разбираются только строго
+ISO_LIKE = r'\s*[+-]?\d{4}-\d{1,2}-\d{1,2}'
+# Компактные даты YYYYMMDD — восьмизначные целые
+YYYYMMDD_MIN = 10000101
+YYYYMMDD_MAX = 99991231
+# Буфер чтения поверх распаковщика zstd
+BUFFER_BYTES = 1024 * 1024
+
+# Сжатые файлы узнаются по первым байтам, а не по расширению
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst')
+
+
+def compression_of(raw):
+    # Формат сжатия открытого двоичного файла или None; позиция файла не меняется
+    head = raw.peek(6)[:6] if hasattr(raw, 'peek') else b''
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def decompressed(raw):
+    """ Поток распакованных байтов поверх открытого двоичного файла raw.
+
+    Распаковка идёт по мере чтения, на диск ничего не пишется. Позиция raw.tell()
+    показывает, сколько сжатых байтов уже прочитано, — по ней считается прогресс.
+    Несжатый файл возвращается как есть. Для .zst нужен пакет zstandard.
+    """
+    kind = compression_of(raw)
+    if kind == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if kind == 'bz2':
+        import bz2
+        return bz2.BZ2File(raw)
+    if kind == 'xz':
+        import lzma
+        return lzma.LZMAFile(raw)
+    if kind == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("Для чтения файлов zstd установите пакет zstandard") from None
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        return io.BufferedReader(reader, BUFFER_BYTES)
+    return raw
+
+
+def plain_name(file_path):
+    # «obs.txt.gz» -> «obs.txt»: расширение данных под расширением сжатия
+    root, ext = os.path.splitext(file_path)
+    return root if ext.lower() in COMPRESSED_SUFFIXES else file_path
+
+
+def split_fields(line):
+    # Разделители «;», «,» и пробельные символы равноправны
+    return line.strip().replace(';', ' ').replace(',', ' ').split()
+
+
+def _parse_iso_fixed(values):
+    # Быстрый путь для ровной колонки «YYYY-MM-DD» или «YYYY-MM-DD HH:MM» ('T' вместо пробела
+    # тоже допустим): цифры разбираются арифметикой над кодами символов. None — формат не тот
+    width = values.dtype.itemsize // 4
+    if width not in (10, 16) or not len(values):
+        return None
+    chars = np.ascontiguousarray(values).view(np.uint32).reshape(len(values), width)
+    digit_pos = [0, 1, 2, 3, 5, 6, 8, 9] + ([11, 12, 14, 15] if width == 16 else [])
+    digits = chars[:, digit_pos].astype(np.int64) - 48
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+    if (chars[:, 4] != ord('-')).any() or (chars[:, 7] != ord('-')).any():
+        return None
+    if width == 16 and (((chars[:, 10] != ord(' ')) & (chars[:, 10] != ord('T'))).any()
+                        or (chars[:, 13] != ord(':')).any()):
+        return None
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    first = months.astype('datetime64[D]').astype(np.int64)
+    length = (months + 1).astype('datetime64[D]').astype(np.int64) - first
+    if ((month < 1) | (month > 12) | (day < 1) | (day > length)).any():
+        return None
+    seconds = (first + day - 1) * 86400
+    if width == 16:
+        hour = digits[:, 8] * 10 + digits[:, 9]
+        minute = digits[:, 10] * 10 + digits[:, 11]
+        if ((hour > 23) | (minute > 59)).any():
+            return None
+        seconds += hour * 3600 + minute * 60
+    return (seconds * 10**9).view('datetime64[ns]')
+
+
+def julian_to_datetime(values):
+    # JD или MJD (по величине числа) -> datetime64[ns]; NaN, даты вне 1800–2200 годов
+    # и MJD меньше MJD_MIN -> NaT
+    values = np.asarray(values, dtype=float)
+    jd = values > JD_THRESHOLD
+    days = np.where(jd, values - JD_UNIX_EPOCH, values - MJD_UNIX_EPOCH)
+    valid = (days >= DAYS_MIN) & (days <= DAYS_MAX) & (jd | (values >= MJD_MIN))
+    ns = np.round(np.where(valid, days, 0) * NS_PER_DAY)
+    result = ns.astype(np.int64).view('datetime64[ns]')
+    result[~valid] = np.datetime64('NaT')
+    return result
+
+
+def numbers_to_datetime(values):
+    # Числовая колонка дат -> datetime64[ns]: восьмизначные целые — YYYYMMDD, остальное — JD/MJD
+    values = np.asarray(values, dtype=float)
+    result = julian_to_datetime(values)
+    compact = (values >= YYYYMMDD_MIN) & (values <= YYYYMMDD_MAX) & (values == np.floor(values))
+    if compact.any():
+        digits = values[compact].astype(np.int64)
+        year, month, day = digits // 10000, digits // 100 % 100, digits % 100
+        months = ((year - 1970) * 12 + np.clip(month, 1, 12) - 1).astype('datetime64[M]')
+        first = months.astype('datetime64[D]')
+        length = ((months + 1).astype('datetime64[D]') - first).astype(np.int64)
+        dates = (first + (day - 1)).astype('datetime64[ns]')
+        dates[(month < 1) | (month > 12) | (day < 1) | (day > length)] = np.datetime64('NaT')
+        result[compact] = dates
+    return result
+
+
+def parse_dates(values, unit='ns'):
+    """ Колонка дат -> datetime64[unit] за один проход; NaT там, где дата не разобралась.
+
+    Порядок попыток: уже datetime64; числа YYYYMMDD или JD/MJD; ровный ISO «YYYY-MM-DD[ HH:MM]»
+    разбором кодов символов. Иначе каждая строка пробуется как ISO, затем как число,
+    затем в свободном формате с днём впереди («01.06.2025»). Строки вида ISO, не прошедшие
+    строгий разбор, и числа в свободный формат не попадают: «2025-13-01» даёт NaT, а не
+    2025-01-13; «3» и «4.5» — тоже NaT (MJD меньше MJD_MIN).
+    """
+    values = np.asarray(values)
+    dtype = f'datetime64[{unit}]'
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype(dtype)
+    if values.dtype.kind in 'iuf':
+        return numbers_to_datetime(values).astype(dtype)
+    if values.dtype.kind == 'S':
+        values = values.astype(str)
+    if values.dtype.kind == 'U':
+        fixed = _parse_iso_fixed(values)
+        if fixed is not None:
+            return fixed.astype(dtype)
+
+    # Общий случай: ISO любого вида, затем числа как JD/MJD, и только остаток —
+    # свободный формат
+    import pandas as pd
+
+    series = pd.Series(values, dtype=object)
+    result = pd.to_datetime(series, errors='coerce', format='ISO8601').to_numpy(dtype='datetime64[ns]')
+    rest = np.isnat(result)
+    if rest.any():
+        numbers = pd.to_numeric(series[rest], errors='coerce').to_numpy(dtype=float)
+        result[rest] = numbers_to_datetime(numbers)
+        # Числа и строки вида ISO («2025-13-01»), не прошедшие строгий разбор, — ошибка, а не
+        # повод переставить поля: в свободный формат идут только DD.MM.YYYY, DD/MM/YYYY и т.п.
+        rest[rest] = np.isnan(numbers) & ~series[rest].astype(str).str.match(ISO_LIKE).to_numpy()
+    if rest.any():
+        parsed = pd.to_datetime(series[rest], errors='coerce', format='mixed', dayfirst=True)
+        result[rest] = parsed.to_numpy(dtype='datetime64[ns]')
+    return result.astype(dtype)
+
+
+def iter_dated_rows(file_path, n_values, chunk_size=50000, progress=None):
+    # Потоковое чтение строк «дата v1 ... vN» кусками по chunk_size строк.
+    # Дата может содержать время через пробел или 'T', либо быть числом JD/MJD;
+    # значения — последние n_values колонок. Строки, которые не удалось разобрать, пропускаются.
+    # progress(прочитано_байт, всего_байт) вызывается после каждого куска
+    with open(file_path, 'rb') as raw, io.TextIOWrapper(decompressed(raw), encoding='utf-8') as f:
+        total = os.fstat(raw.fileno()).st_size
+        while True:
+            lines = list(islice(f, chunk_size))
+            if progress is not None:
+                # Прочитанные байты файла на диске (для сжатого — сжатые байты)
+                progress(raw.tell(), total)
+            if not lines:
+                break
+            dates, values = [], []
+            for line in lines:
+                parts = split_fields(line)
+                if len(parts) <= n_values:
+                    continue
+                try:
+                    row = [float(v) for v in parts[-n_values:]]
+                except ValueError:
+                    continue
+                dates.append(' '.join(parts[:-n_values]))
+                values.append(row)
+            dates = parse_dates(dates, 's')
+            keep = ~np.isnat(dates)
+            dates = dates[keep]
+            values = np.array(values, dtype=float).reshape(-1, n_values)[keep]
+            if len(dates):
+                yield dates, values
+
+
+def iter_padded_rows(file_path, n_values, chunk_size=50000, progress=None):
+    # Как iter_dated_rows, но строки могут быть короче: «дата [время] v1 [... vN]».
+    # Дата — первое поле (со вторым, если в нём время «HH:MM»), недостающие значения в конце — NaN.
+    # Отдаёт (даты, значения, пропущено_строк): строки без значений, с лишними полями,
+    # с нечисловыми значениями или неразобранной датой пропускаются и учитываются
+    with open(file_path, 'rb') as raw, io.TextIOWrapper(decompressed(raw), encoding='utf-8') as f:
+        total = os.fstat(raw.fileno()).st_size
+        while True:
+            lines = list(islice(f, chunk_size))
+            if progress is not None:
+                progress(raw.tell(), total)
+            if not lines:
+                break
+            dates, values, skipped = [], [], 0
+            for line in lines:
+                parts = split_fields(line)
+                if not parts:
+                    continue
+                start = 2 if len(parts) > 2 and ':' in parts[1] else 1
+                fields = parts[start:]
+                if not fields or len(fields) > n_values:
+                    skipped += 1
+                    continue
+                try:
+                    row = [float(v) for v in fields]
+                except ValueError:
+                    skipped += 1
+                    continue
+                dates.append(' '.join(parts[:start]))
+                values.append(row + [np.nan] * (n_values - len(row)))
+            dates = parse_dates(dates, 's')
+            keep = ~np.isnat(dates)
+            skipped += int(len(keep) - np.count_nonzero(keep))
+            values = np.array(values, dtype=float).reshape(-1, n_values)[keep]
+            yield dates[keep], values, skipped
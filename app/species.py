@@ -0,0 +1,211 @@
+import os
+import math
+import numpy as np
+
+# Встроенный каталог: имя, H [эрг/г], mu, P0, P_ref [Па], A [K], T_ref [K], комментарий.
+# Давление пара по Клапейрону–Клаузиусу: P_vap(T) = P_ref * exp(A * (1/T_ref - 1/T))
+DEFAULT_SPECIES = [
+    # Летучие льды (основные компоненты комет)
+    ('H₂O (водяной лёд)', 2.83e10, 18, 1e15, 611, 5425, 273,
+     'Основной компонент кометных ядер. Сублимирует при ~150-200 K'),
+    ('CO₂ (сухой лёд)', 2.3e10, 44, 5.1e6, 5.1e6, 3188, 194,
+     'Второй по распространённости лёд в кометах'),
+    ('CO (угарный газ)', 1.3e10, 28, 1.15e5, 1.15e5, 764, 68,
+     'Сублимирует при очень низких температурах'),
+    ('CH₄ (метан)', 1.9e10, 16, 1.3e5, 1.3e5, 1680, 91,
+     'Обнаружен в кометах 67P и Хартли 2'),
+
+    # Другие органические соединения
+    ('C₂H₆ (этан)', 2.1e10, 30, 2.45e5, 2.45e5, 1980, 90,
+     'Обнаружен в комете Хейла-Боппа'),
+    ('CH₃OH (метанол)', 3.6e10, 32, 1.23e5, 1.23e5, 4630, 175,
+     'Важный органический компонент'),
+    ('H₂CO (формальдегид)', 2.8e10, 30, 4.57e5, 4.57e5, 3200, 134,
+     'Обнаружен в коме комет'),
+
+    # Азотистые соединения
+    ('NH₃ (аммиак)', 2.5e10, 17, 1e5, 1e5, 2000, 100,
+     'Источник атомарного азота'),
+    ('HCN (цианистый водород)', 3.1e10, 27, 3.47e5, 3.47e5, 3400, 150,
+     'Важен для пребиотической химии'),
+
+    # Сера и её соединения
+    ('H₂S (сероводород)', 2.7e10, 34, 1.23e6, 1.23e6, 2800, 120,
+     'Основной источник серы в кометах'),
+    ('SO₂ (диоксид серы)', 3.4e10, 64, 3.82e5, 3.82e5, 4300, 180,
+     'Обнаружен в комете Хейла-Боппа'),
+
+    # Редкие компоненты
+    ('N₂ (азот)', 1.2e10, 28, 3.5e4, 3.5e4, 500, 63,
+     'Трудно обнаружить, но важен для эволюции комет'),
+    ('O₂ (кислород)', 1.6e10, 32, 2.5e4, 2.5e4, 600, 54,
+     'Неожиданно обнаружен в комете 67P'),
+]
+
+COLUMNS = ('H', 'mu', 'P0', 'P_ref', 'A', 'T_ref')
+
+
+class SpeciesCatalog:
+    """ Каталог веществ в виде столбцов NumPy: одна строка — одно вещество """
+
+    def __init__(self, names, comments, H, mu, P0, P_ref, A, T_ref):
+        # names/comments могут быть функцией: тогда боковая таблица имён читается при первом обращении
+        self._names = names if callable(names) else list(names)
+        self._comments = comments if callable(comments) else list(comments)
+        self.H = np.asarray(H, dtype=float)
+        self.mu = np.asarray(mu, dtype=float)
+        self.P0 = np.asarray(P0, dtype=float)
+        self.P_ref = np.asarray(P_ref, dtype=float)
+        self.A = np.asarray(A, dtype=float)
+        self.T_ref = np.asarray(T_ref, dtype=float)
+
+    @property
+    def names(self):
+        if callable(self._names):
+            self._names = list(self._names())
+        return self._names
+
+    @property
+    def comments(self):
+        if callable(self._comments):
+            self._comments = list(self._comments())
+        return self._comments
+
+    def __getstate__(self):
+        # Ленивые загрузчики имён не сериализуются — при передаче в процессы
+        # боковая таблица читается заранее
+        state = self.__dict__.copy()
+        state['_names'] = self.names
+        state['_comments'] = self.comments
+        return state
+
+    @classmethod
+    def default(cls):
+        names, H, mu, P0, P_ref, A, T_ref, comments = zip(*DEFAULT_SPECIES)
+        return cls(names, comments, H, mu, P0, P_ref, A, T_ref)
+
+    @classmethod
+    def load(cls, path):
+        # .npz — все столбцы и имена в одном архиве;
+        # .npy — структурированный массив столбцов, открывается через mmap,
+        # имена и комментарии лежат рядом в текстовой таблице *.names.txt
+        if path.endswith('.npz'):
+            with np.load(path, allow_pickle=False) as archive:
+                columns = [archive[column] for column in COLUMNS]
+                names = archive['names'].tolist()
+                comments = archive['comments'].tolist() if 'comments' in archive else [''] * len(names)
+            return cls(names, comments, *columns)
+
+        table = np.load(path, mmap_mode='r', allow_pickle=False)
+        names_path = os.path.splitext(path)[0] + '.names.txt'
+        side_table = {}
+
+        def read_side_table():
+            if not side_table:
+                names, comments = [], []
+                with open(names_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        name, _, comment = line.rstrip('\n').partition('\t')
+                        names.append(name)
+                        comments.append(comment)
+                side_table['names'] = names
+                side_table['comments'] = comments
+            return side_table
+
+        return cls(
+            lambda: read_side_table()['names'],
+            lambda: read_side_table()['comments'],
+            *(table[column] for column in COLUMNS)
+        )
+
+    def save(self, path):
+        if path.endswith('.npz'):
+            np.savez(
+                path,
+                names=np.array(self.names, dtype=str),
+                comments=np.array(self.comments, dtype=str),
+                **{column: getattr(self, column) for column in COLUMNS}
+            )
+            return
+
+        table = np.empty(len(self), dtype=[(column, '<f8') for column in COLUMNS])
+        for column in COLUMNS:
+            table[column] = getattr(self, column)
+        np.save(path, table)
+        names_path = os.path.splitext(path)[0] + '.names.txt'
+        with open(names_path, 'w', encoding='utf-8') as f:
+            for name, comment in zip(self.names, self.comments):
+                f.write(f"{name}\t{comment}\n")
+
+    def __len__(self):
+        return len(self.H)
+
+    def valid_mask(self):
+        # Вещества без H, mu или P0 в расчёте не участвуют
+        return (self.H != 0) & (self.mu != 0) & (self.P0 != 0)
+
+    def subset(self, mask):
+        if np.all(mask):
+            return self
+        index = np.flatnonzero(mask)
+        return SpeciesCatalog(
+            [self.names[i] for i in index],
+            [self.comments[i] for i in index],
+            *(getattr(self, column)[index] for column in COLUMNS)
+        )
+
+    def _column(self, values, ndim):
+        return values.reshape((-1,) + (1,) * ndim)
+
+    def p_vap(self, T):
+        # Давление пара всех веществ при всех T сразу: форма (вещество, *T.shape)
+        T = np.asarray(T, dtype=float)
+        with np.errstate(divide='ignore', over='ignore'):
+            return self._column(self.P_ref, T.ndim) * np.exp(
+                self._column(self.A, T.ndim) * (1 / self._column(self.T_ref, T.ndim) - 1 / T)
+            )
+
+    def sublimation_factor(self):
+        # Множитель T_sub, зависящий только от вещества
+        xi = 1 + 0.02 * np.log(self.P0 / (6.7e14))
+        return 1.3e3 * (1 / xi) * (self.H / 3.2e10) * (self.mu / 170)
+
+    def t_sub(self, r_sun, r_earth_km, R_earth=6371):
+        r_sun = np.asarray(r_sun, dtype=float)
+        r_earth_km = np.asarray(r_earth_km, dtype=float)
+        ndim = max(r_sun.ndim, r_earth_km.ndim)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._column(self.sublimation_factor(), ndim) * r_sun ** -0.5 * \
+                (1 + 0.1 / (1 + (r_earth_km / R_earth) ** 2))
+
+    def as_elements(self):
+        # Совместимое представление в виде прежнего списка словарей elements_db
+        elements = []
+        for i, name in enumerate(self.names):
+            P_ref, A, T_ref = float(self.P_ref[i]), float(self.A[i]), float(self.T_ref[i])
+            elements.append({
+                'name': name,
+                'H': float(self.H[i]),
+                'mu': float(self.mu[i]),
+                'P0': float(self.P0[i]),
+                'P_vap': lambda T, P_ref=P_ref, A=A, T_ref=T_ref: P_ref * math.exp(A*(1/T_ref - 1/T)),
+                'comment': self.comments[i]
+            })
+        return elements
+
+
+class SublimationIndex:
+    """ Отсортированные множители T_sub для запросов «что сублимирует при r» за O(log N) """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        factor = catalog.sublimation_factor()
+        self.order = np.argsort(factor, kind='stable')
+        self.factor = factor[self.order]
+
+    def query(self, threshold):
+        # T_sub = factor * r^-0.5 * g(r⊕), поэтому условие T_total >= T_sub равносильно
+        # factor <= T_total * sqrt(r) / g(r⊕): критическое расстояние каждого вещества
+        # упорядочено так же, как factor, и ответ — префикс отсортированного массива
+        count = int(np.searchsorted(self.factor, threshold, side='right'))
+        return self.order[:count]
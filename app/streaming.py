@@ -0,0 +1,203 @@
+import numpy as np
+
+
+def first_match(groups, mask, starts):
+    # Первая позиция в каждой корзине, где выполнено условие (для корзины из NaN — её начало).
+    # groups — номер корзины каждой точки, starts — начала корзин
+    first = starts.copy()
+    hits = np.flatnonzero(mask)
+    hit_groups = groups[hits]
+    leading = np.flatnonzero(np.diff(hit_groups, prepend=-1))
+    first[hit_groups[leading]] = hits[leading]
+    return first
+
+
+class StreamStats:
+    """ Число точек, минимум, максимум, среднее и дисперсия X и Y по потоку кусков.
+
+    Куски объединяются формулой Чана для параллельной дисперсии, поэтому сумма квадратов
+    отклонений не теряет точность даже на миллиардах точек.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.min = np.full(2, np.inf)
+        self.max = np.full(2, -np.inf)
+        self.mean = np.zeros(2)
+        self._m2 = np.zeros(2)
+
+    def update(self, x, y):
+        values = np.column_stack((x, y))
+        values = values[np.isfinite(values).all(axis=1)]
+        n = len(values)
+        if not n:
+            return
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self._m2 = self._m2 + m2 + delta**2 * self.count * n / total
+        self.count = total
+        self.min = np.minimum(self.min, values.min(axis=0))
+        self.max = np.maximum(self.max, values.max(axis=0))
+
+    @property
+    def std(self):
+        return np.sqrt(self._m2 / self.count) if self.count else np.full(2, np.nan)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "x": {"min": self.min[0], "max": self.max[0], "mean": self.mean[0], "std": self.std[0]},
+            "y": {"min": self.min[1], "max": self.max[1], "mean": self.mean[1], "std": self.std[1]},
+        }
+
+
+class StreamFit:
+    # Линейная регрессия y = a + b·x по потоку: суммы копятся относительно сдвига,
+    # взятого из первого куска, чтобы не терять точность на больших X
+    def __init__(self):
+        self.count = 0
+        self._shift = None
+        self._sums = np.zeros(5)  # Σx, Σy, Σx², Σxy, Σy²
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        finite = np.isfinite(x) & np.isfinite(y)
+        x, y = x[finite], y[finite]
+        if not len(x):
+            return
+        if self._shift is None:
+            self._shift = (x.mean(), y.mean())
+        x = x - self._shift[0]
+        y = y - self._shift[1]
+        self._sums += (x.sum(), y.sum(), (x * x).sum(), (x * y).sum(), (y * y).sum())
+        self.count += len(x)
+
+    def coefficients(self):
+        # (a, b, r) — свободный член, наклон и коэффициент корреляции
+        n = self.count
+        if n < 2:
+            return np.nan, np.nan, np.nan
+        sx, sy, sxx, sxy, syy = self._sums
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        cov = sxy - sx * sy / n
+        if var_x <= 0:
+            return np.nan, np.nan, np.nan
+        slope = cov / var_x
+        intercept = (sy - slope * sx) / n + self._shift[1] - slope * self._shift[0]
+        r = cov / np.sqrt(var_x * var_y) if var_y > 0 else np.nan
+        return intercept, slope, r
+
+
+class ReducedView:
+    """ Прореженный вид потока для графика: точки делятся на корзины по номеру,
+    от каждой корзины остаются минимум и максимум Y в исходном порядке.
+
+    Когда корзин становится больше max_buckets, соседние корзины попарно сливаются,
+    так что память ограничена независимо от длины потока, а пики не теряются.
+    """
+
+    def __init__(self, max_buckets=2000):
+        self.max_buckets = max_buckets
+        self.width = 1
+        self.count = 0
+        self._buckets = []      # массивы (индекс, x, y) min и max по корзинам
+        self._tail = None       # недобранная последняя корзина
+
+    def _reduce(self, index, x, y):
+        # Кусок, начинающийся на границе корзины, -> (i_min, x_min, y_min, i_max, x_max, y_max)
+        starts = np.arange(0, len(y), self.width)
+        filled = np.where(np.isfinite(y), y, np.nan)
+        lo = np.fmin.reduceat(filled, starts)
+        hi = np.fmax.reduceat(filled, starts)
+        groups = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(y))))
+        at_lo = first_match(groups, filled == lo[groups], starts)
+        at_hi = first_match(groups, filled == hi[groups], starts)
+        return np.column_stack((index[at_lo], x[at_lo], y[at_lo], index[at_hi], x[at_hi], y[at_hi]))
+
+    def _merge_pairs(self, buckets):
+        # Две соседние корзины -> одна: меньший из минимумов и больший из максимумов
+        if len(buckets) % 2:
+            buckets = np.vstack((buckets, buckets[-1:]))
+        pairs = buckets.reshape(-1, 2, 6)
+        lo = np.argmin(np.where(np.isnan(pairs[:, :, 2]), np.inf, pairs[:, :, 2]), axis=1)
+        hi = np.argmax(np.where(np.isnan(pairs[:, :, 5]), -np.inf, pairs[:, :, 5]), axis=1)
+        rows = np.arange(len(pairs))
+        return np.column_stack((pairs[rows, lo, :3], pairs[rows, hi, 3:]))
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        index = np.arange(self.count, self.count + len(y), dtype=float)
+        self.count += len(y)
+        if self._tail is not None:
+            index = np.concatenate((self._tail[0], index))
+            x = np.concatenate((self._tail[1], x))
+            y = np.concatenate((self._tail[2], y))
+        complete = len(y) - len(y) % self.width
+        self._tail = (index[complete:], x[complete:], y[complete:])
+        if complete:
+            self._buckets.append(self._reduce(index[:complete], x[:complete], y[:complete]))
+
+        buckets = sum(len(b) for b in self._buckets)
+        while buckets > self.max_buckets:
+            merged = self._merge_pairs(np.vstack(self._buckets))
+            self._buckets = [merged]
+            self.width *= 2
+            buckets = len(merged)
+
+    def result(self):
+        # Точки вида в исходном порядке: для каждой корзины min и max, без дублей
+        parts = list(self._buckets)
+        if self._tail is not None and len(self._tail[0]):
+            parts.append(self._reduce(*self._tail))
+        if not parts:
+            return np.array([]), np.array([])
+        buckets = np.vstack(parts)
+        points = np.vstack((buckets[:, :3], buckets[:, 3:]))
+        _, unique = np.unique(points[:, 0], return_index=True)
+        points = points[unique]
+        return points[:, 1], points[:, 2]
+
+
+def stream_graph(model, chunks, graph_type, max_points=4000):
+    """ График по потоку кусков (x, y) без загрузки всего файла.
+
+    Каждый кусок проходит то же преобразование GraphModel.plot_graph, по преобразованным
+    точкам копятся статистика, линейная регрессия и прореженный вид. Возвращает словарь
+    plot_graph, где x/y — прореженный вид, плюс "rows", "stats" и "fit".
+    """
+    stats = StreamStats()
+    fit = StreamFit()
+    view = ReducedView(max(1, max_points // 2))
+    result = None
+    for x, y in chunks:
+        result = model.plot_graph({'x_vals': x, 'y_vals': y}, graph_type)
+        if 'error' in result:
+            return result
+        tx = np.asarray(result['x'])
+        if np.issubdtype(tx.dtype, np.datetime64):
+            tx = tx.astype('datetime64[s]').astype(float)
+        ty = np.asarray(result['y'], dtype=float)
+        stats.update(tx, ty)
+        fit.update(tx, ty)
+        view.update(tx, ty)
+
+    if result is None:
+        return {"error": "Точки не заданы"}
+    x, y = view.result()
+    if np.issubdtype(np.asarray(result['x']).dtype, np.datetime64):
+        x = x.astype('datetime64[s]')
+    result.update({
+        "x": x,
+        "y": y,
+        "points": False,
+        "rows": stats.count,
+        "stats": stats.as_dict(),
+        "fit": dict(zip(("intercept", "slope", "r"), fit.coefficients())),
+    })
+    return result
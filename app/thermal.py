@@ -0,0 +1,140 @@
+import numpy as np
+
+S0 = 1361.0                 # солнечная постоянная на 1 а.е. [Вт/м²]
+SIGMA = 5.670374419e-8      # постоянная Стефана–Больцмана [Вт/(м²·K⁴)]
+K_B = 1.380649e-23          # постоянная Больцмана [Дж/K]
+M_U = 1.66053906660e-27     # атомная единица массы [кг]
+ERG_PER_G = 1e-4            # 1 эрг/г = 1e-4 Дж/кг
+
+
+class EnergyBalanceSolver:
+    """ Равновесная температура поверхности для каждого вещества каталога:
+
+        (1 - A) · S0 / r² · f = ε·σ·T⁴ + L · Z(T),  Z(T) = P_vap(T) · sqrt(μ·m_u / (2π·k·T))
+
+    Решение — Ньютон с защитной бисекцией сразу по всем веществам и узлам сетки.
+    """
+
+    def __init__(self, catalog, albedo=0.04, emissivity=0.9, rotation_factor=0.25,
+                 r_min=0.05, r_max=100.0, table_size=512):
+        self.catalog = catalog
+        self.albedo = albedo
+        self.emissivity = emissivity
+        self.rotation_factor = rotation_factor
+        self.r_min = r_min
+        self.r_max = r_max
+        self.table_size = table_size
+        self._table = None
+
+    def _column(self, values, ndim):
+        return values.reshape((-1,) + (1,) * ndim)
+
+    def absorbed_flux(self, r):
+        r = np.asarray(r, dtype=float)
+        return (1 - self.albedo) * S0 / r**2 * self.rotation_factor
+
+    def _constants(self):
+        # Постоянные по веществам: теплота сублимации L [Дж/кг], A, 1/T_ref, P_ref,
+        # множитель sqrt(μ·m_u / (2π·k)) потока Герца–Кнудсена
+        return (
+            self.catalog.H * ERG_PER_G,
+            self.catalog.A,
+            1 / self.catalog.T_ref,
+            self.catalog.P_ref,
+            np.sqrt(self.catalog.mu * M_U / (2 * np.pi * K_B)),
+        )
+
+    def sublimation_flux(self, T):
+        # Массовый поток сублимации [кг/(м²·с)]; первая ось T — вещество
+        T = np.asarray(T, dtype=float)
+        _, A, inv_T_ref, P_ref, kinetic = (self._column(c, T.ndim - 1) for c in self._constants())
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            return P_ref * np.exp(A * (inv_T_ref - 1 / T)) * kinetic / np.sqrt(T)
+
+    def _balance(self, T, log_flux, L, A, inv_T_ref, P_ref, kinetic):
+        # Невязка энергобаланса в логарифмах и её производная по T:
+        # log(ε·σ·T⁴ + L·Z(T)) - log(F) ведёт себя гораздо ровнее экспоненты в Z(T)
+        inv_T = 1 / T
+        sublimation = L * P_ref * np.exp(A * (inv_T_ref - inv_T)) * kinetic * np.sqrt(inv_T)
+        radiation = self.emissivity * SIGMA * T**4
+        total = radiation + sublimation
+        residual = np.log(total) - log_flux
+        derivative = (4 * radiation + sublimation * (A * inv_T - 0.5)) * inv_T / total
+        return residual, derivative
+
+    def _initial_guess(self, flux, T_hi, L, A, inv_T_ref, P_ref, kinetic):
+        # Температура, при которой вся энергия уходит на сублимацию (T под корнем
+        # в Z(T) взята равной T_ref), но не выше радиационного предела
+        scale = L * P_ref * kinetic * np.sqrt(inv_T_ref)
+        T_sub = 1 / (inv_T_ref - np.log(flux / scale) / A)
+        T_sub = np.where(np.isfinite(T_sub) & (T_sub > 0), T_sub, T_hi)
+        return np.minimum(T_sub, T_hi)
+
+    def solve(self, r, tol=1e-6, max_iter=60):
+        # Прямое решение: результат формы (вещество, *r.shape).
+        # Считается в плоском виде, и на каждой итерации остаются только несошедшиеся узлы
+        r = np.asarray(r, dtype=float)
+        n_species = len(self.catalog)
+        flux = np.tile(self.absorbed_flux(r).ravel(), n_species)
+        species = np.repeat(np.arange(n_species), r.size)
+        constants = self._constants()
+
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            # Без сублимации T не может превысить чисто радиационное равновесие
+            T_hi = (flux / (self.emissivity * SIGMA)) ** 0.25
+            T_lo = np.ones_like(T_hi)
+            T = self._initial_guess(flux, T_hi, *(c[species] for c in constants))
+
+            active = np.flatnonzero(np.isfinite(T))
+            for _ in range(max_iter):
+                if not len(active):
+                    break
+                current = T[active]
+                lo, hi = T_lo[active], T_hi[active]
+                residual, derivative = self._balance(
+                    current, np.log(flux[active]), *(c[species[active]] for c in constants)
+                )
+                positive = residual > 0
+                hi = np.where(positive, current, hi)
+                lo = np.where(positive, lo, current)
+
+                step = residual / derivative
+                T_new = current - step
+                outside = ~np.isfinite(T_new) | (T_new < lo) | (T_new > hi)
+                T_new = np.where(outside, 0.5 * (lo + hi), T_new)
+
+                T[active], T_lo[active], T_hi[active] = T_new, lo, hi
+                active = active[np.abs(T_new - current) >= tol]
+
+        return T.reshape((n_species,) + r.shape)
+
+    def _build_table(self):
+        # Таблица T(log F) на равномерной сетке: T зависит от r только через поглощённый поток
+        log_flux = np.linspace(
+            np.log(self.absorbed_flux(self.r_max)),
+            np.log(self.absorbed_flux(self.r_min)),
+            self.table_size
+        )
+        r_nodes = np.sqrt((1 - self.albedo) * S0 * self.rotation_factor / np.exp(log_flux))
+        self._table = (log_flux, self.solve(r_nodes))
+
+    def temperature(self, r):
+        # Быстрый путь для повторных запросов: линейная интерполяция по таблице,
+        # точки вне диапазона [r_min, r_max] решаются напрямую
+        if self._table is None:
+            self._build_table()
+        log_flux, table = self._table
+
+        r = np.asarray(r, dtype=float)
+        x = np.log(self.absorbed_flux(r))
+        step = log_flux[1] - log_flux[0]
+        position = (x - log_flux[0]) / step
+        inside = (position >= 0) & (position <= len(log_flux) - 1)
+
+        i = np.clip(np.floor(position).astype(int), 0, len(log_flux) - 2)
+        w = np.clip(position - i, 0, 1)
+        T = table[:, i] * (1 - w) + table[:, i + 1] * w
+
+        if not inside.all():
+            T[:, ~inside] = self.solve(r[~inside])
+        return T
@@ -0,0 +1,52 @@
+import numpy as np
+
+from app.readers import iter_dated_rows
+
+
+def sublimation_timeline(model, file_path, T=None, chunk_size=50000, progress=None):
+    # Даты начала и окончания сублимации каждого вещества вдоль орбиты по эфемеридам «дата r Δ».
+    # Интервал (начало, конец): конец — первая дата, когда вещество уже не сублимирует,
+    # либо последняя дата эфемерид. Память зависит от chunk_size, а не от длины файла.
+    names = None
+    intervals = None
+    active = None
+    start = None
+    first_date = None
+    last_date = None
+    rows = 0
+
+    for dates, values in iter_dated_rows(file_path, 2, chunk_size, progress):
+        grid = model.calculate_sublimation_grid(values[:, 0], values[:, 1], T)
+        sublimating = grid['sublimating']
+        if names is None:
+            names = grid['names']
+            intervals = [[] for _ in names]
+            active = np.zeros(len(names), dtype=bool)
+            start = np.full(len(names), np.datetime64('NaT'), dtype='datetime64[s]')
+            first_date = dates[0]
+
+        previous = np.concatenate([active[:, None], sublimating], axis=1)
+        changed = previous[:, 1:] != previous[:, :-1]
+        for species, i in zip(*np.nonzero(changed)):
+            if sublimating[species, i]:
+                start[species] = dates[i]
+            else:
+                intervals[species].append((start[species], dates[i]))
+
+        active = sublimating[:, -1].copy()
+        last_date = dates[-1]
+        rows += len(dates)
+
+    if names is None:
+        raise ValueError("В файле нет строк эфемерид вида «дата r Δ»")
+
+    for species in np.flatnonzero(active):
+        intervals[species].append((start[species], last_date))
+
+    return {
+        "names": names,
+        "intervals": intervals,
+        "start": first_date,
+        "end": last_date,
+        "rows": rows,
+    }
@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from app.models import SublimationModel, MassModel, SizeModel
+
+# Входные параметры каждой модели в фиксированном порядке выборки
+MODEL_INPUTS = {
+    'sublimation': ('r0', 'r_earth', 'T'),
+    'mass': ('m_k', 'delta', 'r'),
+    'size': ('H', 'pv'),
+}
+
+# Какую величину модель возвращает для распределения
+MODEL_OUTPUTS = {
+    'sublimation': 'T_total',
+    'mass': 'N',
+    'size': 'D',
+}
+
+PERCENTILES = (2.5, 16, 50, 84, 97.5)
+
+
+def _draw(rng, value, error, n):
+    # Нормальное распределение вокруг значения; без погрешности — константа
+    if not error:
+        return np.full(n, float(value))
+    return float(value) + float(error) * rng.standard_normal(n)
+
+
+def _evaluate_chunk(model, values, errors, n, seed, catalog=None):
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for key in MODEL_INPUTS[model]:
+        if values.get(key) is not None:
+            samples[key] = _draw(rng, values[key], errors.get(key, 0), n)
+
+    counts = None
+    if model == 'sublimation':
+        grid = SublimationModel(catalog).calculate_sublimation_grid(
+            samples['r0'], samples['r_earth'], samples.get('T')
+        )
+        # Те же ограничения, что в calculate_sublimation: r⊕ = 0 допустимо только при заданной T
+        valid = (samples['r0'] > 0) & (samples['r_earth'] >= 0)
+        if 'T' not in samples:
+            valid &= samples['r_earth'] != 0
+        output = np.where(valid, grid['T_total'], np.nan)
+        counts = grid['sublimating'][:, valid].sum(axis=1)
+    elif model == 'mass':
+        output = MassModel().mass_loss(samples['m_k'], samples['delta'], samples['r'])
+    else:
+        output = SizeModel().diameter(samples['H'], samples['pv'])
+
+    return output, counts
+
+
+def _summary(values, percentiles, bins):
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return {"percentiles": {}, "mean": np.nan, "std": np.nan, "histogram": ([], [])}
+    counts, edges = np.histogram(finite, bins=bins)
+    return {
+        "percentiles": dict(zip(percentiles, np.percentile(finite, percentiles))),
+        "mean": float(finite.mean()),
+        "std": float(finite.std()),
+        "histogram": (counts, edges),
+    }
+
+
+def propagate(model, values, errors, n_samples=100000, seed=None, workers=None,
+              chunk_size=250000, percentiles=PERCENTILES, bins=50, catalog=None):
+    """ Монте-Карло для моделей sublimation, mass и size.
+
+    values/errors — словари значений и 1σ-погрешностей входов модели. Выборка делится
+    на куски фиксированного размера с собственным потомком SeedSequence, поэтому при
+    одном seed результат не зависит от числа процессов.
+    """
+    if model not in MODEL_INPUTS:
+        raise ValueError(f"Неизвестная модель: {model}")
+    if model == 'sublimation' and catalog is None:
+        catalog = SublimationModel().catalog
+
+    sizes = [chunk_size] * (n_samples // chunk_size)
+    if n_samples % chunk_size:
+        sizes.append(n_samples % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(model, values, errors, n, s, catalog) for n, s in zip(sizes, seeds)]
+
+    if workers == 1 or len(tasks) <= 1:
+        results = [_evaluate_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_evaluate_chunk, *zip(*tasks)))
+
+    output = np.concatenate([o for o, _ in results])
+    valid = int(np.isfinite(output).sum())
+    result = {
+        "model": model,
+        "samples": n_samples,
+        "rejected": n_samples - valid,
+        "outputs": {MODEL_OUTPUTS[model]: _summary(output, percentiles, bins)},
+    }
+    if model == 'sublimation':
+        counts = np.sum([c for _, c in results], axis=0)
+        result["probabilities"] = dict(zip(catalog.subset(catalog.valid_mask()).names,
+                                           counts / max(valid, 1)))
+    return result
+
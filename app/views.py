@@ -1,6 +1,7 @@
 import os
 import sys
 import json
+import numpy as np
 import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -20,17 +21,32 @@ from PyQt5.QtWidgets import (
     QListView,
     QFileDialog,
     QComboBox,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
+    QHeaderView,
     QSizePolicy,
+    QDialog,
+    QDialogButtonBox,
+    QFormLayout,
 )
 from PyQt5.QtCore import Qt, QSize
 from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
+import matplotlib.dates as mdates
 import matplotlib as mpl
 
+from app.points_model import PointsTableModel
+from app.point_manager import PointManager
+from app.persistence import ParamsStore, load_points
+from app.readers import parse_dates
+from app import decimation
+
+# Поля вкладки «Графики» с точками; всё остальное — обычные параметры
+POINT_KEYS = ('x_points', 'y_points')
+# Буфер не длиннее этого показывается в текстовых полях и правится как текст
+TEXT_POINTS_LIMIT = 1000
+
 def resource_path(relative_path):
     """ Получает абсолютный путь к ресурсу, работает для dev и для PyInstaller """
     if getattr(sys, 'frozen', False):
@@ -337,6 +353,22 @@ class SublimationTab(QWidget):
             }
         """)
         layout.addWidget(self.calc_btn)
+
+        self.timeline_btn = QPushButton("Периоды сублимации по эфемеридам")
+        self.timeline_btn.setStyleSheet("""
+            QPushButton {
+                background-color: white;
+                border-radius: 20px;
+                color: #000034;
+                font-size: 18px;
+                font-weight: bold;
+                padding: 10px;
+            }
+            QPushButton:hover {
+                background-color: #aaccff;
+            }
+        """)
+        layout.addWidget(self.timeline_btn)
         
         self.result_label = QLabel("Результат:")
         self.result_label.setStyleSheet("""
@@ -453,16 +485,166 @@ class GraphWindow(QMainWindow):
         self.ax.title.set_color("white")
 
         self.toolbar = CustomNavigationToolbar(self.canvas, self)
+        # Режим прореживания длинных рядов; виден, только когда ряд прорежен
+        self.decimation_mode = QComboBox()
+        for mode, title in decimation.MODES.items():
+            self.decimation_mode.addItem(title, mode)
+        self.decimation_mode.currentIndexChanged.connect(lambda _: self._redecimate())
+        self.decimation_action = self.toolbar.addWidget(self.decimation_mode)
+        self.decimation_action.setVisible(False)
+        self.series = None
 
         graph_layout.addWidget(self.toolbar)
         graph_layout.addWidget(self.canvas)
         main_layout.addWidget(graph_container)
 
+    def plot_series(self, x, y, y_err=None, points=False):
+        # Линия, погрешности и точки ряда. Длинный ряд рисуется прореженным, а при каждом
+        # изменении видимого участка оси X прореживается заново из полных массивов
+        self.series = None
+        x = np.asarray(x)
+        y = np.asarray(y, dtype=float)
+        if len(x) <= decimation.MIN_POINTS:
+            self.ax.plot(x, y, color="blue")
+            if y_err is not None:
+                self.ax.errorbar(x, y, yerr=y_err, fmt='none', ecolor="gray", zorder=2)
+            if points:
+                self.ax.scatter(x, y, color="red", zorder=3)
+            return
+
+        dates = np.issubdtype(x.dtype, np.datetime64)
+        numbers = mdates.date2num(x) if dates else x.astype(float)
+        finite = np.isfinite(numbers) & np.isfinite(y)
+        order = None if finite.all() else np.flatnonzero(finite)
+        if np.any(np.diff(numbers[finite]) < 0):
+            # Прореживание идёт по участкам X, поэтому точки упорядочиваются по X
+            order = np.flatnonzero(finite)[np.argsort(numbers[finite], kind='stable')]
+        if order is not None:
+            x, y, numbers = x[order], y[order], numbers[order]
+            y_err = np.asarray(y_err, dtype=float)[order] if y_err is not None else None
+        series = {'x': x, 'numbers': numbers, 'y': y, 'y_err': y_err}
+        shown = decimation.decimate(numbers, y, self._pixels(), self.decimation_mode.currentData())
+        series['line'], = self.ax.plot(x[shown], y[shown], color="blue")
+        if y_err is not None:
+            series['errors'] = self.ax.errorbar(
+                x[shown], y[shown], yerr=y_err[shown], fmt='none', ecolor="gray", zorder=2
+            ).lines[2][0]
+        if points:
+            series['points'] = self.ax.scatter(x[shown], y[shown], color="red", zorder=3)
+        self.series = series
+        self.decimation_action.setVisible(True)
+        self.ax.callbacks.connect('xlim_changed', lambda ax: self._redecimate())
+        # Окно ещё не показано: после раскладки ширина области в пикселях станет другой
+        self.canvas.mpl_connect('resize_event', lambda event: self._redecimate())
+
+    def _pixels(self):
+        return self.ax.bbox.width
+
+    def _redecimate(self):
+        series = self.series
+        if series is None:
+            return
+        shown = decimation.decimate(
+            series['numbers'], series['y'], self._pixels(), self.decimation_mode.currentData(),
+            self.ax.get_xlim()
+        )
+        x, y = series['numbers'][shown], series['y'][shown]
+        series['line'].set_data(series['x'][shown], y)
+        if 'errors' in series:
+            err = series['y_err'][shown]
+            series['errors'].set_segments(np.stack((np.column_stack((x, y - err)), np.column_stack((x, y + err))), axis=1))
+        if 'points' in series:
+            series['points'].set_offsets(np.column_stack((x, y)))
+        self.canvas.draw_idle()
+
+    def plot_timeline(self, timeline):
+        # Диаграмма Ганта: по строке на вещество, полосы — интервалы сублимации
+        self.ax.clear()
+        rows = [(name, spans) for name, spans in zip(timeline['names'], timeline['intervals']) if spans]
+        for row, (name, spans) in enumerate(rows):
+            starts = mdates.date2num(np.array([s for s, _ in spans], dtype='datetime64[s]'))
+            ends = mdates.date2num(np.array([e for _, e in spans], dtype='datetime64[s]'))
+            self.ax.broken_barh(list(zip(starts, ends - starts)), (row - 0.4, 0.8), color="#5f8bff")
+        self.ax.set_yticks(range(len(rows)))
+        self.ax.set_yticklabels([name for name, _ in rows])
+        self.ax.set_xlim(mdates.date2num(timeline['start']), mdates.date2num(timeline['end']))
+        self.ax.xaxis_date()
+        self.ax.set_xlabel("Дата")
+        if rows:
+            self.ax.set_title("Периоды сублимации вдоль орбиты")
+        else:
+            self.ax.set_title("Ни одно вещество не сублимирует на заданном участке орбиты")
+        self.ax.grid(True, axis='x')
+        self.figure.autofmt_xdate()
+        self.canvas.draw()
+
+    def plot_mass_series(self, series):
+        # N [кг] по каждому наблюдению ряда (лог. шкала)
+        self.ax.clear()
+        self.ax.plot(series['dates'], series['N'], color="#5f8bff", marker="o", markersize=3)
+        self.ax.set_yscale('log')
+        self.ax.set_xlabel("Дата наблюдения")
+        self.ax.set_ylabel("N, кг")
+        self.ax.set_title("Масса, выделяемая кометой, по ряду наблюдений")
+        self.ax.grid(True)
+        self.figure.autofmt_xdate()
+        self.canvas.draw()
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if hasattr(self, "background"):
             self.background.setGeometry(0, 0, self.width(), self.height())
 
+class FitsColumnsDialog(QDialog):
+    # Выбор таблицы BINTABLE и колонок X, Y и погрешностей Y для загрузки точек из FITS
+    NO_COLUMN = "—"
+
+    def __init__(self, tables, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Колонки таблицы FITS")
+        self.tables = tables
+
+        layout = QFormLayout(self)
+        self.table_box = QComboBox()
+        for table in tables:
+            self.table_box.addItem(f"{table['name']} ({table['rows']} строк)")
+        self.x_box = QComboBox()
+        self.y_box = QComboBox()
+        self.err_box = QComboBox()
+        layout.addRow("Таблица:", self.table_box)
+        layout.addRow("X:", self.x_box)
+        layout.addRow("Y:", self.y_box)
+        layout.addRow("Погрешность Y:", self.err_box)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+        self.table_box.currentIndexChanged.connect(self._fill_columns)
+        self._fill_columns(0)
+
+    def _fill_columns(self, index):
+        columns = self.tables[index]['columns']
+        for box in (self.x_box, self.y_box, self.err_box):
+            box.clear()
+        self.x_box.addItems(columns)
+        self.y_box.addItems(columns)
+        self.err_box.addItem(self.NO_COLUMN)
+        self.err_box.addItems(columns)
+        if len(columns) > 1:
+            self.y_box.setCurrentIndex(1)
+        errors = [c for c in columns if 'ERR' in c.upper()]
+        if errors:
+            self.err_box.setCurrentText(errors[0])
+
+    def selection(self):
+        # (номер HDU, колонка X, колонка Y, колонка погрешностей или None)
+        table = self.tables[self.table_box.currentIndex()]
+        err = self.err_box.currentText()
+        return table['hdu'], self.x_box.currentText(), self.y_box.currentText(), \
+            None if err == self.NO_COLUMN else err
+
 class GraphTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -587,6 +769,10 @@ class GraphTab(QWidget):
             "Звездной величины от даты": resource_path("data/params_mag_date.json"),
         }
         self.saved_params = {t: self._load_params(t) for t in self.graph_types_list}
+        # Точки по типам графиков держатся в памяти, на диск уходят отложенно и в бинарном виде
+        self.saved_points = {}
+        self.points_dirty = set()
+        self.params_store = ParamsStore(self)
         self.last_graph_type = self.graph_types_list[0]
         self.param_rows = {}
         self.param_labels = {}
@@ -673,24 +859,54 @@ class GraphTab(QWidget):
         """)
         params_layout.addWidget(self.clear_points_btn)
 
+        # База наблюдений: график строится прямо по выборке кометы за интервал дат
+        self.store_comet = QComboBox()
+        self.store_date_from = QLineEdit()
+        self.store_date_to = QLineEdit()
+        store_comet_row, _ = self.create_param_row("Комета из базы наблюдений:", self.store_comet, param_label_style)
+        self.store_comet.setStyleSheet(self.graph_type.styleSheet())
+        self.store_comet.setFixedSize(250, 40)
+        params_layout.addWidget(store_comet_row)
+        store_from_row, _ = self.create_param_row("С даты (YYYY-MM-DD):", self.store_date_from, param_label_style)
+        params_layout.addWidget(store_from_row)
+        store_to_row, _ = self.create_param_row("По дату (YYYY-MM-DD):", self.store_date_to, param_label_style)
+        params_layout.addWidget(store_to_row)
+
+        store_buttons = QHBoxLayout()
+        self.store_import_btn = QPushButton("Импорт в базу")
+        self.store_plot_btn = QPushButton("Построить из базы")
+        for button in (self.store_import_btn, self.store_plot_btn):
+            button.setStyleSheet(self.load_points_btn.styleSheet())
+            store_buttons.addWidget(button)
+        params_layout.addLayout(store_buttons)
+
         layout.addWidget(params_frame)
 
         self.graph_type.currentIndexChanged.connect(self.on_graph_type_changed)
         self.update_param_fields()
         saved = self.saved_params.get(self.last_graph_type, {})
         for k, w in self.graph_params.items():
-            if k in saved:
+            if k in saved and k not in POINT_KEYS:
                 w.setText(saved[k])
 
-        self.points_table = QTableWidget()
-        self.points_table.setColumnCount(2)
-        self.points_table.setHorizontalHeaderLabels(["X", "Y"])
-        self.points_table.horizontalHeader().setStretchLastSection(True)
+        # Единственный источник точек вкладки: типизированные массивы, общие для таблицы,
+        # контроллера и GraphModel. Текстовые поля разбираются, только если их правил пользователь
+        self.point_manager = PointManager()
+        self.points_text_edited = False
+        for key in POINT_KEYS:
+            self.graph_params[key].textEdited.connect(self._on_points_text_edited)
+        self.points_model = PointsTableModel(self.point_manager, self)
+        self.points_model.pointsEdited.connect(self._on_points_edited)
+        self.points_table = QTableView()
+        self.points_table.setModel(self.points_model)
+        self.points_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Фиксированная высота строк: представлению не нужно измерять каждую строку
+        self.points_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.points_table.setStyleSheet("background-color: white; color: #000034; border-radius: 20px; color: #000034;")
         self.points_table.setMinimumHeight(150)
         layout.addWidget(self.points_table)
 
-        self._update_points_table(saved.get('x_points', ''), saved.get('y_points', ''))
+        self._restore_points(self.last_graph_type)
 
         self.plot_btn = QPushButton("Построить график")
         self.plot_btn.setStyleSheet("""
@@ -774,72 +990,141 @@ class GraphTab(QWidget):
         return {}
 
     def _save_params(self, gtype, params):
+        # Не пишет сразу: ParamsStore сливает частые сохранения и пишет в фоне.
+        # Точки отдаются на запись, только если менялись с прошлого сохранения
+        path = self.params_files.get(gtype)
+        if not path:
+            return
+        points = None
+        if gtype in self.points_dirty and gtype in self.saved_points:
+            points = self.saved_points[gtype]
+            self.points_dirty.discard(gtype)
+        self.params_store.schedule(path, params, points)
+
+    def _points_for(self, gtype):
+        if gtype in self.saved_points:
+            return self.saved_points[gtype]
         path = self.params_files.get(gtype)
-        if path:
+        points = load_points(path) if path else None
+        if points is None:
+            # Старый формат: точки текстом в JSON — разбираются один раз и переезжают в .points.npy
+            points = self._points_from_text(gtype, self.saved_params.get(gtype, {}))
+            if len(points[0]):
+                self.points_dirty.add(gtype)
+        self.saved_points[gtype] = points
+        return points
+
+    def _points_from_text(self, gtype, saved):
+        xs = self._parse_text(saved.get('x_points', ''))
+        ys = self._parse_text(saved.get('y_points', ''))
+        if xs and ys and len(xs) == len(ys):
             try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(params, f, ensure_ascii=False, indent=2)
-            except Exception:
+                if gtype in ("Afρ от даты", "Звездной величины от даты"):
+                    return parse_dates(xs), np.array(ys, dtype=float)
+                return np.array(xs, dtype=float), np.array(ys, dtype=float)
+            except ValueError:
                 pass
-
-    def _update_points_table(self, x_text, y_text):
-        xs = self._parse_text(x_text)
-        ys = self._parse_text(y_text)
-        if xs and ys and len(xs) == len(ys):
-            self.set_points(xs, ys)
+        return np.array([]), np.array([])
+
+    def _restore_points(self, gtype):
+        self.point_manager.x, self.point_manager.y = self._points_for(gtype)
+        self.point_manager.y_err = None
+        self.points_model.reset()
+        self._show_points_text()
+
+    def _points_text(self, values):
+        if np.issubdtype(values.dtype, np.datetime64):
+            # Даты без хвоста из нулей: «2025-06-01» или «2025-06-01T12:30»
+            return ' '.join(np.datetime_as_string(values, unit='auto'))
+        return ' '.join(map(str, values.tolist()))
+
+    def _current_params(self):
+        # Точки в JSON не попадают — они лежат в бинарном .points.npy рядом
+        return {k: w.text() for k, w in self.graph_params.items() if k not in POINT_KEYS}
+
+    def _show_points_text(self):
+        # Буфер изменился не через текстовые поля: небольшой буфер выводится в них текстом,
+        # чтобы одну точку можно было поправить, у большого остаётся только подсказка
+        x, y = self.point_manager.x, self.point_manager.y
+        count = len(x)
+        editable = count <= TEXT_POINTS_LIMIT
+        for key, values in zip(POINT_KEYS, (x, y)):
+            self.graph_params[key].setText(self._points_text(values) if editable else "")
+            self.graph_params[key].setPlaceholderText(f"{count} точек в таблице" if count else "")
+        self.points_text_edited = False
+
+    def _on_points_text_edited(self):
+        count = len(self.point_manager.x)
+        if not self.points_text_edited and count > TEXT_POINTS_LIMIT:
+            # Набранный текст заменит загруженный буфер целиком — только с согласия пользователя
+            answer = QMessageBox.question(
+                self, "Точки",
+                f"В таблице {count} загруженных точек. Заменить их точками, набранными в полях?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if answer != QMessageBox.Yes:
+                self._show_points_text()
+                return
+        self.points_text_edited = True
+
+    def set_points(self, x_vals, y_vals, from_text=False, y_err=None):
+        # Таблица показывает сами массивы буфера, без копии и без строк.
+        # from_text — точки только что разобраны из текстовых полей, и текст в них оставляется
+        self.point_manager.x = np.asarray(x_vals)
+        self.point_manager.y = np.asarray(y_vals)
+        self.point_manager.y_err = y_err
+        self.points_model.reset()
+        if from_text:
+            self.points_text_edited = False
         else:
-            self.clear_points()
-    
-    def set_points(self, x_vals, y_vals):
-        self.points_table.setRowCount(0)
-        for xv, yv in zip(x_vals, y_vals):
-            row = self.points_table.rowCount()
-            self.points_table.insertRow(row)
-            self.points_table.setItem(row, 0, QTableWidgetItem(str(xv)))
-            self.points_table.setItem(row, 1, QTableWidgetItem(str(yv)))
-        self.graph_params['x_points'].setText(' '.join(str(v) for v in x_vals))
-        self.graph_params['y_points'].setText(' '.join(str(v) for v in y_vals))
+            self._show_points_text()
+        self._points_changed()
+
+    def _points_changed(self):
         ctype = self.graph_type.currentText()
-        self.saved_params[ctype] = {k: w.text() for k, w in self.graph_params.items()}
+        self.saved_points[ctype] = (self.point_manager.x, self.point_manager.y)
+        self.points_dirty.add(ctype)
+        self.saved_params[ctype] = self._current_params()
         self._save_params(ctype, self.saved_params[ctype])
 
+    def _on_points_edited(self):
+        self._show_points_text()
+        self._points_changed()
+
     def clear_points(self):
-        self.points_table.setRowCount(0)
-        self.graph_params['x_points'].clear()
-        self.graph_params['y_points'].clear()
-        ctype = self.graph_type.currentText()
-        self.saved_params[ctype] = {k: w.text() for k, w in self.graph_params.items()}
-        self._save_params(ctype, self.saved_params[ctype])
+        self.set_points(np.array([]), np.array([]))
+
+    def set_comets(self, names):
+        current = self.store_comet.currentText()
+        self.store_comet.clear()
+        self.store_comet.addItems(names)
+        if current in names:
+            self.store_comet.setCurrentText(current)
 
     def get_point_texts(self):
-        if self.points_table.rowCount() > 0:
-            xs = []
-            ys = []
-            for row in range(self.points_table.rowCount()):
-                x_item = self.points_table.item(row, 0)
-                y_item = self.points_table.item(row, 1)
-                if x_item and y_item:
-                    xs.append(x_item.text())
-                    ys.append(y_item.text())
-            return ' '.join(xs), ' '.join(ys)
         return (
             self.graph_params['x_points'].text(),
             self.graph_params['y_points'].text(),
         )
     
     def on_graph_type_changed(self):
-        self.saved_params[self.last_graph_type] = {
-            k: w.text() for k, w in self.graph_params.items()
-        }
+        if self.points_text_edited:
+            # Набранные, но ещё не построенные точки не теряются при переключении
+            texts = dict(zip(POINT_KEYS, self.get_point_texts()))
+            x_vals, y_vals = self._points_from_text(self.last_graph_type, texts)
+            if len(x_vals):
+                self.saved_points[self.last_graph_type] = (x_vals, y_vals)
+                self.points_dirty.add(self.last_graph_type)
+        self.saved_params[self.last_graph_type] = self._current_params()
         self._save_params(self.last_graph_type, self.saved_params[self.last_graph_type])
         new_type = self.graph_type.currentText()
         if new_type not in self.saved_params:
             self.saved_params[new_type] = self._load_params(new_type)
         saved = self.saved_params.get(new_type, {})
         for k, w in self.graph_params.items():
-            if k in saved:
+            if k in saved and k not in POINT_KEYS:
                 w.setText(saved[k])
-        self._update_points_table(saved.get('x_points', ''), saved.get('y_points', ''))
+        self._restore_points(new_type)
         self.last_graph_type = new_type
         self.update_param_fields()
     
@@ -946,6 +1231,22 @@ class MassTab(QWidget):
             }
         """)
         layout.addWidget(self.calc_btn)
+
+        self.series_btn = QPushButton("Ряд наблюдений из файла")
+        self.series_btn.setStyleSheet("""
+            QPushButton {
+                background-color: white;
+                border-radius: 20px;
+                color: #000034;
+                font-size: 18px;
+                font-weight: bold;
+                padding: 10px;
+            }
+            QPushButton:hover {
+                background-color: #aaccff;
+            }
+        """)
+        layout.addWidget(self.series_btn)
         
         self.result_label = QLabel("Результат:")
         self.result_label.setStyleSheet("""
@@ -1157,6 +1458,11 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("KUBSU Astro App")
         self.setMinimumSize(1100, 900)
         self.setup_ui()
+
+    def closeEvent(self, event):
+        # Отложенные сохранения параметров графиков дописываются до выхода
+        self.tabs["graphs"].params_store.flush()
+        super().closeEvent(event)
     
     def setup_ui(self):
         central_widget = QWidget()
@@ -0,0 +1,72 @@
+""" Пропускная способность загрузки файла точек: несжатый текст против gzip, bz2, xz и zstd.
+
+    python -m benchmarks.compressed_input --rows 2000000 --repeat 3
+
+Файл генерируется во временном каталоге, каждый вариант загружается через
+PointManager.load_from_file без кэша. МБ/с считаются по объёму несжатого текста.
+"""
+import os
+import bz2
+import gzip
+import lzma
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from app.point_manager import PointManager
+
+
+def _codecs():
+    codecs = {
+        'gzip': lambda data: gzip.compress(data, compresslevel=6),
+        'bz2': lambda data: bz2.compress(data, compresslevel=9),
+        'xz': lambda data: lzma.compress(data, preset=1),
+    }
+    try:
+        import zstandard
+        codecs['zstd'] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+    except ImportError:
+        pass
+    return codecs
+
+
+def _load_time(path, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        manager = PointManager()
+        manager.cache = None
+        start = time.perf_counter()
+        ok, msg = manager.load_from_file(path)
+        best = min(best, time.perf_counter() - start)
+        if not ok:
+            raise ValueError(msg)
+    return best, len(manager.x)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0.5, 10.0, args.rows))
+    y = 1000.0 * x ** -2 + rng.normal(0, 1.0, args.rows)
+    text = ''.join(f"{a:.6f} {b:.6f}\n" for a, b in zip(x.tolist(), y.tolist())).encode()
+    plain_mb = len(text) / 1024 ** 2
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = {'plain': text}
+        files.update({name: compress(text) for name, compress in _codecs().items()})
+        print(f"{'формат':<8}{'размер, МБ':>12}{'время, с':>10}{'МБ/с':>10}{'строк':>10}")
+        for name, data in files.items():
+            path = os.path.join(directory, f"points.{name}")
+            with open(path, 'wb') as f:
+                f.write(data)
+            seconds, rows = _load_time(path, args.repeat)
+            print(f"{name:<8}{len(data) / 1024 ** 2:>12.1f}{seconds:>10.2f}{plain_mb / seconds:>10.1f}{rows:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+""" Прореживание ряда перед отрисовкой: мин/макс по пикселю и LTTB, весь ряд и увеличенный участок.
+
+    python -m benchmarks.decimation --points 2000000 --pixels 1000 --repeat 5
+
+Ряд — случайное блуждание с одиночным выбросом. Для каждого режима печатается время
+decimate(), число оставленных точек и сохранился ли выброс; «участок» — 1/1000 оси X,
+как после увеличения в окне графика.
+"""
+import time
+import argparse
+import numpy as np
+
+from app.decimation import MODES, decimate
+
+
+def _best_time(repeat, *args):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        shown = decimate(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, shown
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=2_000_000)
+    parser.add_argument('--pixels', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    x = np.arange(args.points, dtype=float)
+    y = np.cumsum(rng.normal(size=args.points))
+    spike = args.points // 3
+    y[spike] += 100 * y.std()
+    middle = args.points / 2
+    ranges = [("весь ряд", None), ("участок", (middle, middle + args.points / 1000))]
+
+    for mode, title in MODES.items():
+        for label, x_range in ranges:
+            seconds, shown = _best_time(args.repeat, x, y, args.pixels, mode, x_range)
+            extra = f"  выброс {'сохранён' if spike in shown else 'потерян'}" if x_range is None else ""
+            print(f"{title:<22}{label:<10}{seconds * 1000:>8.1f} мс{len(shown):>8} точек{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+""" Чтение параметров из заголовков FITS: полный обход astropy против выборочного чтения.
+
+    python -m benchmarks.fits_headers --extensions 64 --size 512 --cards 300
+
+Во временном каталоге создаётся мозаика из первичного HDU с параметрами и --extensions
+изображений --size×--size с --cards лишними картами в каждом. Сравниваются
+SublimationModel.load_fits_data(full_scan=True), выборочный режим по умолчанию
+(останов на первичном HDU) и выборочный режим с параметрами в последнем расширении.
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from app.models import SublimationModel
+
+PARAMS = {'T': 160.0, 'R0': 1.5, 'REARTH': 1.0, 'H': 10.5, 'PV': 0.04, 'DELTA': 1.2}
+
+
+def _write_mosaic(path, extensions, size, cards, params_in_last):
+    from astropy.io import fits
+
+    primary = fits.PrimaryHDU()
+    hdus = [primary]
+    for index in range(extensions):
+        image = fits.ImageHDU(np.zeros((size, size), dtype=np.float32), name=f"CCD{index + 1}")
+        for card in range(cards):
+            image.header[f"JUNK{card:04d}"] = (card * 0.5, "filler card")
+        hdus.append(image)
+    target = hdus[-1] if params_in_last else primary
+    for key, value in PARAMS.items():
+        target.header[key] = value
+    fits.HDUList(hdus).writeto(path, overwrite=True)
+
+
+def _best_time(path, repeat, **kwargs):
+    best = np.inf
+    for _ in range(repeat):
+        model = SublimationModel()
+        start = time.perf_counter()
+        model.load_fits_data(path, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, model.data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--extensions', type=int, default=64)
+    parser.add_argument('--size', type=int, default=512)
+    parser.add_argument('--cards', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        first = os.path.join(directory, 'params_first.fits')
+        last = os.path.join(directory, 'params_last.fits')
+        _write_mosaic(first, args.extensions, args.size, args.cards, params_in_last=False)
+        _write_mosaic(last, args.extensions, args.size, args.cards, params_in_last=True)
+        print(f"мозаика: {args.extensions} расширений, {os.path.getsize(first) / 1024 ** 2:.0f} МБ")
+
+        cases = [
+            ("полный обход (astropy)", first, {'full_scan': True}),
+            ("выборочно, параметры в HDU 0", first, {}),
+            ("полный обход, параметры в конце", last, {'full_scan': True}),
+            ("выборочно, параметры в конце", last, {}),
+            ("выборочно, только последнее расширение", last, {'extensions': [args.extensions]}),
+        ]
+        for label, path, kwargs in cases:
+            seconds, data = _best_time(path, args.repeat, **kwargs)
+            print(f"{label:<42}{seconds * 1000:>10.1f} мс{len(data):>6} ключей")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+""" Разбор файла точек «x y»: построчный цикл Python против разборщиков NumPy и PointManager.
+
+    python -m benchmarks.point_parsing --rows 2000000 --repeat 3
+
+Файл генерируется во временном каталоге. «Построчно» — прежний цикл load_from_file
+(float() для каждого поля), np.loadtxt и np.fromstring разбирают тот же текст целиком,
+PointManager.load_from_file — без кэша, с учётом чтения файла. Ускорение — относительно
+построчного цикла.
+"""
+import io
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from app.point_manager import PointManager
+
+
+def _lines(path):
+    x_vals, y_vals = [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.replace(';', ',').replace(',', ' ').split()
+            if len(parts) >= 2:
+                try:
+                    x_vals.append(float(parts[0]))
+                    y_vals.append(float(parts[1]))
+                except ValueError:
+                    continue
+    return np.array(x_vals), np.array(y_vals)
+
+
+def _loadtxt(path):
+    with open(path, 'rb') as f:
+        return np.loadtxt(io.BytesIO(f.read()))
+
+
+def _fromstring(path):
+    with open(path, 'rb') as f:
+        return np.fromstring(f.read(), sep=' ').reshape(-1, 2)
+
+
+def _point_manager(path):
+    manager = PointManager()
+    manager.cache = None
+    return manager.load_from_file(path)
+
+
+def _best_time(func, path, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'points.txt')
+        values = np.column_stack((rng.uniform(0.5, 5, args.rows), rng.uniform(100, 10000, args.rows)))
+        np.savetxt(path, values, fmt=('%.6f', '%.4f'))
+        print(f"файл: {args.rows} строк, {os.path.getsize(path) / 1024 ** 2:.0f} МБ")
+
+        cases = [
+            ("построчно (float)", _lines),
+            ("np.loadtxt", _loadtxt),
+            ("np.fromstring", _fromstring),
+            ("PointManager.load_from_file", _point_manager),
+        ]
+        baseline = None
+        for label, func in cases:
+            seconds = _best_time(func, path, args.repeat)
+            baseline = baseline or seconds
+            print(f"{label:<30}{seconds:>8.3f} с{baseline / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()